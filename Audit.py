@@ -0,0 +1,198 @@
+"""
+Monte Carlo audit of a generated slot. Sampled item arrival orders are played out on the board simulator, and the
+sphere each coin is first reached in is compared against the sphere Rules puts it in logic.
+
+    python -m worlds.dracomino.Audit audit_input.json --samples 100 --workers 8
+
+The input is a JSON object with "slot_data", the slot's fill_slot_data output, and "received", the names of the items
+the slot receives at the start of each sphere, like from Spheres.get_received_items_by_sphere. create_audit_input
+makes one from a generated world; for older seeds, the spheres can be taken from the spoiler's playthrough.
+
+Items within a sphere arrive in a random order for each sample, and shapes are played in the order they arrive.
+Each sphere, the shapes are used to clear lines except for the last few, which build up towards each coin.
+The simulator can't slide pieces under overhangs, so coins high above the board are harder for it than for a player.
+"""
+import argparse
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from worlds.AutoWorld import World
+
+from .Board import SHAPE_ORIENTATIONS, Board, simulate
+from .Constants import BOARD_WIDTH
+from .ItemPool import SHAPES_BY_TYPE
+from .Items import item_name_to_id, generate_item_counter_deltas
+from .Locations import get_location_names_with_tag
+from .Rules import DracominoLogic, ROTATE_ITEMS, create_logic_settings
+from .Spheres import DracominoSphereCalculator, get_received_items_by_sphere
+
+SAMPLES:int = 50
+SEED:int = 1
+BEAM_WIDTH:int = 1
+TOWER_SHAPES:int = 16 # Shapes at the end of each sphere that build towards coins instead of clearing lines
+
+class DracominoAuditSlot(NamedTuple):
+    goal:int
+    line_clear_leniency:int
+    max_stacking_height:int
+    randomize_orientations:bool
+    item_pickup_placements:List[int]
+    shapes:List[str] # Shapes of the pool's shape types; only these count as corner shapes, like for DracominoWorld.item_counter_deltas
+    received:List[List[str]] # Names of items received at the start of each sphere
+
+class DracominoAuditResult(NamedTuple):
+    samples:int
+    logic_spheres:Dict[int, Optional[int]] # Sphere Rules puts each coin in logic, by placement
+    unreached_in_logic:Dict[int, int] # Samples where a coin in logic wasn't reached by its sphere, by placement
+    reached_out_of_logic:Dict[int, int] # Samples where a coin was reached before it was in logic, by placement
+
+def create_audit_input(world:World) -> Dict[str, Any]:
+    "Audit input for a Dracomino world in a multiworld that has been filled"
+    return {
+        "slot_data": world.fill_slot_data(),
+        "received": get_received_items_by_sphere(world.multiworld, world.player),
+    }
+
+def load_audit_slot(data:Dict[str, Any]) -> DracominoAuditSlot:
+    slot_data:Dict[str, Any] = data["slot_data"]
+    # JSON turns the ids into strings
+    item_counts = {int(_id): count for _id, count in slot_data["item_counts"].items()}
+    # Generation counts every shape of a type with weight, drawn or not, like ItemPool.create_shape_plan.
+    # Weights aren't in slot data, so a type counts if any of its shapes are in the pool
+    shapes = [
+        name for names in SHAPES_BY_TYPE.values() if any(item_counts.get(item_name_to_id[name]) for name in names)
+        for name in names
+    ]
+    return DracominoAuditSlot(
+        slot_data["goal"],
+        slot_data["line_clear_leniency"],
+        slot_data["max_stacking_height"],
+        slot_data["randomize_orientations"],
+        slot_data["item_pickup_placements"],
+        shapes,
+        data["received"],
+    )
+
+def get_logic_spheres(slot:DracominoAuditSlot) -> Dict[int, Optional[int]]:
+    # Generation never treats a slot as monomino-only; see Rules.get_logic_settings
+    settings = create_logic_settings(slot.goal, slot.max_stacking_height, False)
+    calculator = DracominoSphereCalculator(
+        DracominoLogic(settings, slot.goal),
+        generate_item_counter_deltas(slot.shapes),
+        slot.item_pickup_placements,
+        slot.goal - 1,
+        slot.goal + slot.line_clear_leniency,
+    )
+    spheres = calculator.calculate(slot.received)
+    coin_names = get_location_names_with_tag("item_pickup", len(slot.item_pickup_placements))
+    return {placement: spheres.locations.get(name) for name, placement in zip(coin_names, slot.item_pickup_placements)}
+
+def audit_sample(slot:DracominoAuditSlot, seed:int, beam_width:int, tower_shapes:int) -> Dict[int, int]:
+    "Sphere each coin is first reached in for one sampled arrival order, by placement; unreached coins are left out"
+    rng = random.Random(seed)
+    orientation_rng = rng if slot.randomize_orientations else None
+    shapes:List[str] = []
+    shapes_by_sphere:List[int] = [] # Number of shapes received by the end of each sphere
+    rotate_from:Optional[int] = None
+    for items in slot.received:
+        items = list(items)
+        rng.shuffle(items)
+        for name in items:
+            if name in SHAPE_ORIENTATIONS:
+                shapes.append(name)
+            elif name in ROTATE_ITEMS and rotate_from is None:
+                rotate_from = len(shapes)
+        shapes_by_sphere.append(len(shapes))
+    if rotate_from is None:
+        rotate_from = len(shapes)
+
+    # Clear lines up to where each sphere's tower starts
+    tower_starts:List[int] = sorted({max(0, count - tower_shapes) for count in shapes_by_sphere})
+    boards:Dict[int, Board] = {}
+    board = Board()
+    cleared:int = 0
+    for start in tower_starts:
+        if start > cleared:
+            board = simulate(shapes[cleared:start], 0, True, beam_width, rng=orientation_rng,
+                             clear_lines=True, rotate_from=rotate_from - cleared, board=board).board
+            cleared = start
+        boards[start] = board
+
+    coins_by_column:Dict[int, List[int]] = {}
+    for placement in sorted(slot.item_pickup_placements):
+        coins_by_column.setdefault(placement % BOARD_WIDTH, []).append(placement)
+    reached:Dict[int, int] = {}
+    for sphere, count in enumerate(shapes_by_sphere):
+        start = max(0, count - tower_shapes)
+        for column, coins in coins_by_column.items():
+            if not coins:
+                continue
+            reach = simulate(shapes[start:count], column, True, beam_width, rng=orientation_rng,
+                             rotate_from=rotate_from - start, board=boards[start]).reach
+            # Coins in a column are sorted by row
+            while coins and coins[0]//BOARD_WIDTH <= reach:
+                reached[coins.pop(0)] = sphere
+    return reached
+
+def audit(slot:DracominoAuditSlot, samples:int = SAMPLES, seed:int = SEED, beam_width:int = BEAM_WIDTH,
+          tower_shapes:int = TOWER_SHAPES, workers:Optional[int] = None) -> DracominoAuditResult:
+    "Audit a slot with samples spread over a process pool; workers defaults to every core"
+    logic_spheres = get_logic_spheres(slot)
+    unreached_in_logic:Dict[int, int] = {placement: 0 for placement in slot.item_pickup_placements}
+    reached_out_of_logic:Dict[int, int] = {placement: 0 for placement in slot.item_pickup_placements}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for reached in executor.map(audit_sample, [slot]*samples, range(seed, seed + samples), [beam_width]*samples, [tower_shapes]*samples):
+            for placement, logic_sphere in logic_spheres.items():
+                reached_sphere = reached.get(placement)
+                if logic_sphere is not None and (reached_sphere is None or reached_sphere > logic_sphere):
+                    unreached_in_logic[placement] += 1
+                elif reached_sphere is not None and (logic_sphere is None or reached_sphere < logic_sphere):
+                    reached_out_of_logic[placement] += 1
+    return DracominoAuditResult(samples, logic_spheres, unreached_in_logic, reached_out_of_logic)
+
+def print_result(slot:DracominoAuditSlot, result:DracominoAuditResult, top:int) -> None:
+    coin_names = dict(zip(slot.item_pickup_placements, get_location_names_with_tag("item_pickup", len(slot.item_pickup_placements))))
+    for title, counts in (
+        ("In logic but not reached by the simulator", result.unreached_in_logic),
+        ("Reached by the simulator before being in logic", result.reached_out_of_logic),
+    ):
+        mismatches = sorted((placement for placement, count in counts.items() if count), key=lambda placement: (-counts[placement], placement))
+        print(f"{title}: {len(mismatches)} of {len(counts)} coins")
+        for placement in mismatches[:top]:
+            print(f"    {coin_names[placement]:<12} line {placement//BOARD_WIDTH + 1:>5} column {placement % BOARD_WIDTH + 1:>2}"
+                  f"  logic sphere {result.logic_spheres[placement]!s:>5}  {counts[placement]/result.samples:>6.1%} of samples")
+
+def main(args:Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check that coins in logic are reachable on the board")
+    parser.add_argument("input", help="JSON file with slot_data and received")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--beam-width", type=int, default=BEAM_WIDTH)
+    parser.add_argument("--tower-shapes", type=int, default=TOWER_SHAPES)
+    parser.add_argument("--workers", type=int, help="Processes to use; defaults to every core")
+    parser.add_argument("--top", type=int, default=20, help="Coins to list for each kind of mismatch")
+    parser.add_argument("--json", help="Also write the counts to this file")
+    parsed = parser.parse_args(args)
+
+    with open(parsed.input) as f:
+        slot = load_audit_slot(json.load(f))
+    result = audit(slot, parsed.samples, parsed.seed, parsed.beam_width, parsed.tower_shapes, parsed.workers)
+    print_result(slot, result, parsed.top)
+    if parsed.json:
+        with open(parsed.json, "w") as f:
+            json.dump({
+                "samples": result.samples,
+                "coins": [
+                    {
+                        "placement": placement,
+                        "logic_sphere": result.logic_spheres[placement],
+                        "unreached_in_logic": result.unreached_in_logic[placement],
+                        "reached_out_of_logic": result.reached_out_of_logic[placement],
+                    } for placement in slot.item_pickup_placements
+                ],
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Headless board for checking the logic's height heuristics against actual placements.
+
+Rows are bitmasks with bit x for column x, bottom row first. Pieces are hard dropped straight down from above
+the stack, so they can't be slid under overhangs, and full rows are cleared like in the game.
+"""
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+import random
+from .Constants import BOARD_WIDTH, BOARD_HEIGHT
+
+FULL_ROW:int = (1 << BOARD_WIDTH) - 1
+
+# Cells of each shape in its flattest orientation, top row first, which is what poor heights in Constants.ITEMS assume.
+# Without rotate, shapes are only placed in this orientation
+SHAPE_CELLS:Dict[str, Tuple[str, ...]] = {
+    "Monomino":     ("#",),
+    "Domino":       ("##",),
+    "I Tromino":    ("###",),
+    "L Tromino":    ("#.", "##"),
+    "I Tetromino":  ("####",),
+    "O Tetromino":  ("##", "##"),
+    "T Tetromino":  (".#.", "###"),
+    "J Tetromino":  ("#..", "###"),
+    "L Tetromino":  ("..#", "###"),
+    "S Tetromino":  (".##", "##."),
+    "Z Tetromino":  ("##.", ".##"),
+    "I Pentomino":  ("#####",),
+    "U Pentomino":  ("#.#", "###"),
+    "T Pentomino":  ("###", ".#.", ".#."),
+    "X Pentomino":  (".#.", "###", ".#."),
+    "V Pentomino":  ("#..", "#..", "###"),
+    "W Pentomino":  ("#..", "##.", ".##"),
+    "L Pentomino":  ("...#", "####"),
+    "J Pentomino":  ("#...", "####"),
+    "S Pentomino":  (".##", ".#.", "##."),
+    "Z Pentomino":  ("##.", ".#.", ".##"),
+    "F Pentomino":  (".##", "##.", ".#."),
+    "F' Pentomino": ("##.", ".##", ".#."),
+    "N Pentomino":  ("##..", ".###"),
+    "N' Pentomino": ("..##", "###."),
+    "P Pentomino":  ("##.", "###"),
+    "Q Pentomino":  (".##", "###"),
+    "Y Pentomino":  (".#..", "####"),
+    "Y' Pentomino": ("..#.", "####"),
+}
+
+class Orientation(NamedTuple):
+    width:int
+    height:int
+    rows:Tuple[int, ...] # Bottom row first, column 0 is bit 0
+    bottoms:Tuple[int, ...] # Lowest cell of each column
+    tops:Tuple[int, ...] # One above the highest cell of each column
+    size:int # Number of cells
+
+def parse_cells(art:Sequence[str]) -> FrozenSet[Tuple[int, int]]:
+    return frozenset(
+        (x, len(art) - 1 - y) for y, line in enumerate(art) for x, char in enumerate(line) if char == "#"
+    )
+
+def normalize_cells(cells:FrozenSet[Tuple[int, int]]) -> FrozenSet[Tuple[int, int]]:
+    min_x = min(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    return frozenset((x - min_x, y - min_y) for x, y in cells)
+
+def create_orientation(cells:FrozenSet[Tuple[int, int]]) -> Orientation:
+    width = max(x for x, _ in cells) + 1
+    height = max(y for _, y in cells) + 1
+    return Orientation(
+        width,
+        height,
+        tuple(sum(1 << x for x, y in cells if y == row) for row in range(height)),
+        tuple(min(y for x, y in cells if x == column) for column in range(width)),
+        tuple(max(y for x, y in cells if x == column) + 1 for column in range(width)),
+        len(cells),
+    )
+
+def generate_orientations(art:Sequence[str]) -> Tuple[Orientation, ...]:
+    "Every distinct rotation of a shape, with the orientation in SHAPE_CELLS first"
+    cells = normalize_cells(parse_cells(art))
+    seen:List[FrozenSet[Tuple[int, int]]] = []
+    for _ in range(4):
+        if cells not in seen:
+            seen.append(cells)
+        cells = normalize_cells(frozenset((y, -x) for x, y in cells))
+    return tuple(create_orientation(cells) for cells in seen)
+
+SHAPE_ORIENTATIONS:Dict[str, Tuple[Orientation, ...]] = {
+    name: generate_orientations(art) for name, art in SHAPE_CELLS.items()
+}
+
+class Board:
+    __slots__ = ("rows", "heights", "blocks", "lines_cleared", "height_limit")
+    rows:List[int]
+    heights:List[int] # Number of rows up to and including the highest block of each column
+    blocks:int # Cells filled
+    lines_cleared:int
+    height_limit:int
+
+    def __init__(self, height_limit:int = BOARD_HEIGHT):
+        self.rows = [0]*height_limit
+        self.heights = [0]*BOARD_WIDTH
+        self.blocks = 0
+        self.lines_cleared = 0
+        self.height_limit = height_limit
+
+    def copy(self) -> "Board":
+        board = Board.__new__(Board)
+        board.rows = self.rows.copy()
+        board.heights = self.heights.copy()
+        board.blocks = self.blocks
+        board.lines_cleared = self.lines_cleared
+        board.height_limit = self.height_limit
+        return board
+
+    def landing_row(self, orientation:Orientation, x:int) -> int:
+        "Row the bottom of the orientation ends up on when dropped at column x"
+        heights = self.heights
+        return max(heights[x + column] - bottom for column, bottom in enumerate(orientation.bottoms))
+
+    def place(self, orientation:Orientation, x:int) -> Optional[int]:
+        "Drop the orientation at column x and clear lines; returns the number cleared, or None if it doesn't fit"
+        y = self.landing_row(orientation, x)
+        if y + orientation.height > self.height_limit:
+            return None
+        rows = self.rows
+        self.blocks += orientation.size
+        full_rows:List[int] = []
+        for offset, mask in enumerate(orientation.rows):
+            row = rows[y + offset] | (mask << x)
+            rows[y + offset] = row
+            if row == FULL_ROW:
+                full_rows.append(y + offset)
+        if not full_rows:
+            heights = self.heights
+            for column, top in enumerate(orientation.tops):
+                heights[x + column] = max(heights[x + column], y + top)
+            return 0
+        for row in reversed(full_rows):
+            del rows[row]
+        rows.extend([0]*len(full_rows))
+        self.lines_cleared += len(full_rows)
+        self.blocks -= len(full_rows)*BOARD_WIDTH
+        self.update_heights()
+        return len(full_rows)
+
+    def update_heights(self) -> None:
+        rows = self.rows
+        heights = self.heights
+        for column in range(BOARD_WIDTH):
+            bit = 1 << column
+            height = self.height_limit
+            while height and not rows[height - 1] & bit:
+                height -= 1
+            heights[column] = height
+
+    def reach(self, column:int) -> int:
+        "Highest row counted from the start of the game with a block in the column, or -1 if there's none"
+        return self.lines_cleared + self.heights[column] - 1
+
+    def holes(self) -> int:
+        "Empty cells under the top of their column"
+        return sum(self.heights) - self.blocks
+
+class SimulationResult(NamedTuple):
+    reach:int # Highest row reached in the target column at any point
+    lines_cleared:int
+    placements:int # Placements tried
+    reaches:List[int] # Highest row reached in the target column after each shape
+    board:Board # Best board after the last shape
+
+def reach_key(column:int) -> Callable[[Board], Tuple[int, int]]:
+    "Highest reach first, then whatever wasted the least height elsewhere"
+    return lambda board: (board.reach(column), -sum(board.heights))
+
+def clear_lines_key(board:Board) -> float:
+    "Usual weights for a one-piece Tetris player: clear lines, and keep the stack low, flat and without holes"
+    heights = board.heights
+    bumpiness = sum(abs(heights[column] - heights[column + 1]) for column in range(BOARD_WIDTH - 1))
+    return 0.76*board.lines_cleared - 0.51*sum(heights) - 0.36*board.holes() - 0.18*bumpiness
+
+def simulate(shapes:Sequence[str], column:int, rotate:bool, beam_width:int = 1,
+             height_limit:int = BOARD_HEIGHT, rng:Optional[random.Random] = None,
+             clear_lines:bool = False, rotate_from:int = 0, board:Optional[Board] = None) -> SimulationResult:
+    """
+    Place the shapes in order with a beam search that tries to reach as high as possible in the column,
+    or to clear lines while keeping the board clean if clear_lines is set.
+    Without rotate, each shape only has its orientation in SHAPE_CELLS, or a random one if rng is given, like randomize_orientations.
+    With rotate, shapes before rotate_from still can't rotate. The search continues from board if given.
+    """
+    beam:List[Board] = [board.copy() if board else Board(height_limit)]
+    key = clear_lines_key if clear_lines else reach_key(column)
+    best_reach:int = beam[0].reach(column)
+    best_lines:int = beam[0].lines_cleared
+    placements:int = 0
+    reaches:List[int] = []
+    for index, shape in enumerate(shapes):
+        orientations = SHAPE_ORIENTATIONS[shape]
+        if not rotate or index < rotate_from:
+            orientations = (rng.choice(orientations),) if rng else orientations[:1]
+        children:List[Board] = []
+        for parent in beam:
+            for orientation in orientations:
+                for x in range(BOARD_WIDTH - orientation.width + 1):
+                    placements += 1
+                    child = parent.copy()
+                    if child.place(orientation, x) is not None:
+                        children.append(child)
+        if not children:
+            break # Topped out
+        children.sort(key=key, reverse=True)
+        beam = children[:beam_width]
+        for child in beam:
+            if child.reach(column) > best_reach:
+                best_reach = child.reach(column)
+                best_lines = child.lines_cleared
+        reaches.append(best_reach)
+    # Nothing more is reached after topping out
+    reaches.extend([best_reach]*(len(shapes) - len(reaches)))
+    return SimulationResult(best_reach, best_lines, placements, reaches, beam[0])
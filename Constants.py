@@ -90,10 +90,11 @@ ITEMS = [
     [329, "Y' Pentomino",   "",  [ "progression_skip_balancing", "shape", "pentomino", "has_corner_gap", "has_second_tile_gap" ],   1, 3],
 ]
 
+# Each entry is a run of locations: first id, count, name format (numbered from 1), tags
 LOCATIONS = [
     # Line Clears (1-1000)
-    *([i,        f"Line {i} Cleared", "", [ "line_clear" ]] for i in range(1, 1001)),
+    [1,         1000,   "Line {} Cleared",  [ "line_clear" ]],
     
     # Shape Clears (10001-20000)
-    *([i + 10000, f"Coin {i}", "", [ "item_pickup" ]] for i in range(1, 10001)),
+    [10001,     10000,  "Coin {}",          [ "item_pickup" ]],
 ]
\ No newline at end of file
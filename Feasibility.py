@@ -0,0 +1,70 @@
+"""
+Checks from options alone whether a slot's locations can fit, without building anything.
+Only needs a DracominoOptions, so it can also validate options before generating, like on the webhost.
+"""
+import math
+from typing import NamedTuple
+
+from Options import OptionError
+
+from . import Util
+from .Constants import BOARD_WIDTH, SHAPE_VALUES
+from .ItemPool import choose_abilities, get_starting_drop
+from .Options import DracominoOptions
+from .Regions import calc_item_pickup_location_interval, get_too_little_space_message
+
+class DracominoPoolEstimate(NamedTuple):
+    "Bounds on the item pool size and the interval between coins it leads to; a bigger pool means a smaller interval"
+    min_pool_size:int
+    expected_pool_size:float
+    max_pool_size:int
+    max_location_interval:float
+    expected_location_interval:float
+    min_location_interval:float
+
+def estimate_pool(options:DracominoOptions) -> DracominoPoolEstimate:
+    "Work out what decide_itempools can make from these options, without changing them"
+    SHAPE_WEIGHTS = Util.get_shape_weights(options)
+    if not any(SHAPE_WEIGHTS.values()):
+        # Same default as DracominoWorld.generate_early
+        SHAPE_WEIGHTS["tetromino"] = 1
+    total_weight:int = sum(SHAPE_WEIGHTS.values())
+    shape_values = [SHAPE_VALUES[shape_type] for shape_type, weight in SHAPE_WEIGHTS.items() if weight]
+    expected_shape_value:float = sum(SHAPE_VALUES[shape_type]*weight for shape_type, weight in SHAPE_WEIGHTS.items())/total_weight
+
+    start_inventory_as_set = frozenset(options.start_inventory.value.keys()) | {get_starting_drop(options)}
+    ability_set, _ = choose_abilities(options, start_inventory_as_set)
+    num_other_items:int = (
+        len(ability_set - start_inventory_as_set)
+        + options.next_piece_slots.value
+        + options.hold_slots.value
+        + options.tutorials.value
+    )
+
+    # Starting shapes count against the blocks to fill, then shapes are added until they're all filled
+    num_blocks:int = (options.goal.value + options.line_clear_leniency.value)*BOARD_WIDTH
+    num_extra_shapes:int = max(0, options.extra_shapes.value)
+    def num_shapes(starting_shape_value:float, shape_value:float) -> float:
+        return max(0, (num_blocks - options.starting_shapes.value*starting_shape_value)/shape_value) + num_extra_shapes
+    def pool_size(shapes:float) -> float:
+        return num_other_items + shapes + round(shapes*options.trap_weight.value/total_weight)
+    def interval(size:float) -> float:
+        return calc_item_pickup_location_interval(options.goal.value, options.max_stacking_height.value, size)
+
+    # Fewest shapes when every shape is the biggest, most when every shape is the smallest
+    min_pool_size = int(pool_size(math.ceil(num_shapes(max(shape_values), max(shape_values)))))
+    expected_pool_size = pool_size(num_shapes(expected_shape_value, expected_shape_value))
+    max_pool_size = int(pool_size(math.ceil(num_shapes(min(shape_values), min(shape_values)))))
+    return DracominoPoolEstimate(
+        min_pool_size,
+        expected_pool_size,
+        max_pool_size,
+        interval(min_pool_size),
+        interval(expected_pool_size),
+        interval(max_pool_size),
+    )
+
+def check_feasibility(options:DracominoOptions, player_name:str) -> None:
+    "Raise the same OptionError as Regions.create_regions if no item pool these options make could fit"
+    if estimate_pool(options).max_location_interval < 1.0:
+        raise OptionError(get_too_little_space_message(player_name))
@@ -1,12 +1,19 @@
-from typing import Dict, List, FrozenSet, Set
+from typing import Dict, Iterable, List, FrozenSet, NamedTuple, Set, Tuple
 from worlds.AutoWorld import World
-from BaseClasses import ItemClassification as IC
-from .Items import item_data_table, item_name_to_id, DracominoItem, DracominoItemData
+from .Items import item_data_table, item_name_to_id, item_prototypes, event_item_prototype, DracominoItem, DracominoItemData
 from .Options import DracominoOptions
-from .Constants import BOARD_WIDTH, RARITY_WEIGHTS
+from .Constants import BOARD_WIDTH, BOARD_HEIGHT, RARITY_WEIGHTS, SHAPE_VALUES
+from .Tags import get_tag_mask, TAG_ABILITY, TAG_PROGRESSIVE, TAG_TUTORIAL, TAG_TRAP, TAG_SHAPE, TAG_ROTATE, TAG_DROP
 from . import Util
 
 class ShapeGenerator:
+    """
+    Draws from a bag without replacement, refilling it once it's empty.
+
+    Draws swap the chosen entry to the end of the bag before popping it, so each one is O(1).
+    This makes the same random calls as popping from the middle of the bag did, but leaves the
+    bag in a different order, so a seed draws different shapes than it did in 0.3.0 and earlier.
+    """
     shape_pool:List[str]
     current_bag:List[str]
     def __init__(self, shape_pool:List[str]):
@@ -14,58 +21,129 @@ class ShapeGenerator:
         self.current_bag = self.shape_pool.copy()
 
     def create(self, world:World) -> str:
+        bag = self.current_bag
         # Refill
-        if len(self.current_bag) == 0:
-            self.current_bag.extend(self.shape_pool)
+        if len(bag) == 0:
+            bag.extend(self.shape_pool)
         # Pull from the list
-        return self.current_bag.pop(world.random.randint(0, len(self.current_bag) - 1))
+        index = world.random.randint(0, len(bag) - 1)
+        bag[index], bag[-1] = bag[-1], bag[index]
+        return bag.pop()
+
+    def draw_many(self, world:World, count:int) -> List[str]:
+        return [self.create(world) for _ in range(count)]
     
     def reset_bag(self) -> None:
         self.current_bag.clear()
         self.current_bag.extend(self.shape_pool)
     
+# Shapes of each type, in item table order
+SHAPES_BY_TYPE:Dict[str, List[str]] = {
+    shape_type: [
+        name for name, item in item_data_table.items() if item.has_tags(TAG_SHAPE) and item.has_tags(get_tag_mask([shape_type]))
+    ] for shape_type in SHAPE_VALUES
+}
+
+class ShapePlan(NamedTuple):
+    "Shape choices that only depend on shape weights"
+    whitelisted_shape_types:List[str]
+    shape_type_weighted_list:List[str] # Each shape type repeated by its weight
+    shapes:List[str] # Shapes of whitelisted types, in item table order
+    max_shape_value:int
+    total_weight:int
+
+def create_shape_plan(shape_weights:Dict[str, int]) -> ShapePlan:
+    whitelisted_shape_types = [shape_type for shape_type, weight in shape_weights.items() if weight]
+    whitelisted_shape_types_mask = get_tag_mask(whitelisted_shape_types)
+    # Make weighted list to pull types from
+    shape_type_weighted_list:List[str] = []
+    for shape_type in whitelisted_shape_types:
+        for _ in range(shape_weights[shape_type]):
+            shape_type_weighted_list.append(shape_type)
+    return ShapePlan(
+        whitelisted_shape_types,
+        shape_type_weighted_list,
+        [name for name, item in item_data_table.items() if item.has_tags(TAG_SHAPE) and item.has_any_tags(whitelisted_shape_types_mask)],
+        # Nothing in pool is bigger than this
+        max(SHAPE_VALUES[shape_type] for shape_type in whitelisted_shape_types),
+        sum(shape_weights.values()),
+    )
+
+# Rarity tags in the order they're checked, with how many of a trap with that rarity go in the trap bag
+RARITY_MASKS:List[Tuple[int, int]] = [(get_tag_mask([rarity]), weight) for rarity, weight in RARITY_WEIGHTS.items()]
+
+def create_trap_bag(trap_items:List[str]) -> List[str]:
+    "Traps repeated by how common their rarity is"
+    trap_bag:List[str] = []
+    for trap_name in trap_items:
+        _num = RARITY_WEIGHTS["common"]
+        for mask, weight in RARITY_MASKS:
+            if item_data_table[trap_name].has_tags(mask):
+                _num = weight
+                break
+        for _ in range(_num):
+            trap_bag.append(trap_name)
+    return trap_bag
+
+# TODO: Replace with option when there are more ability sets
+ABILITY_SET:int = get_tag_mask(["classic"])
+NONPROGRESSIVE_ABILITIES:FrozenSet[str] = frozenset(name for name, item in item_data_table.items() if (
+    item.has_tags(TAG_ABILITY) and not item.has_tags(TAG_PROGRESSIVE)
+))
+
+def get_starting_drop(options:DracominoOptions) -> str:
+    return (
+             "Soft Drop" if options.starting_drop_method.value == options.starting_drop_method.option_soft_drop
+        else "Hard Drop" if options.starting_drop_method.value == options.starting_drop_method.option_hard_drop
+        else "Gravity"
+    )
+
+def choose_abilities(options:DracominoOptions, start_inventory_as_set:FrozenSet[str]) -> Tuple[Set[str], Set[str]]:
+    "Abilities allowed in the pool, and the rotate abilities that had to be added to them; doesn't change options"
+    ability_set:Set[str] = {name for name in NONPROGRESSIVE_ABILITIES if item_data_table[name].has_tags(ABILITY_SET)}
+    ability_set.intersection_update(options.ability_whitelist.value)
+    # Require rotate to be in pool
+    _rotates:Set[str] = set()
+    if not len({name for name in start_inventory_as_set|ability_set if item_data_table[name].has_tags(TAG_ROTATE)}):
+        _rotates = {name for name, item in item_data_table.items() if item.has_tags(TAG_ROTATE | ABILITY_SET)}
+        ability_set.update(_rotates)
+    return ability_set, _rotates
+
 class DracominoItemPool:
     # Class variables; intended to be overwritten
     normal_itempool:List[str] = [] # All items except junk
-    shapes:List[str] = [name for name, item in item_data_table.items() if "shape" in item.tags]
+    shapes:List[str] = [name for name, item in item_data_table.items() if item.has_tags(TAG_SHAPE)]
     region_order:List[str] = []
+    region_band_lines:int = 0 # If set, locations are split into regions of this many lines of height; otherwise they're all in Menu
     item_counts:Dict[int, int] = {}
 
     def decide_itempools(self, world:World) -> None:
         "Before generating, decide what items go in itempool categories"
         options:DracominoOptions = world.options
         SHAPE_WEIGHTS = Util.get_shape_weights(options)
+        shape_plan:ShapePlan = Util.SharedOptionCache.get(
+            ("shape_plan", tuple(SHAPE_WEIGHTS.items())), lambda: create_shape_plan(SHAPE_WEIGHTS)
+        )
 
         # Set instance variables
         self.normal_itempool = list()
         self.region_order = list()
-        self.shapes:List[str] = list()
+        self.region_band_lines = options.height_band_lines.value
+        self.shapes:List[str] = list(shape_plan.shapes)
         self.item_counts:Dict[int, int] = {}
 
         #
         trap_items:List[str] = list()
 
         # Give starting drop ability
-        options.start_inventory.value[
-                 "Soft Drop" if options.starting_drop_method.value == options.starting_drop_method.option_soft_drop
-            else "Hard Drop" if options.starting_drop_method.value == options.starting_drop_method.option_hard_drop
-            else "Gravity"
-        ] = 1
+        options.start_inventory.value[get_starting_drop(options)] = 1
 
         start_inventory_as_set:FrozenSet[str] = frozenset(options.start_inventory.value.keys())
 
         # Filter items
-        ABILITY_SET = "classic" # TODO: Replace with option when there are more ability sets
-        NONPROGRESSIVE_ABILITIES = {name for name, item in item_data_table.items() if (
-            "ability" in item.tags and not "progressive" in item.tags
-        )}
-        ability_set:Set[str] = {name for name in NONPROGRESSIVE_ABILITIES if ABILITY_SET in item_data_table[name].tags}
-        ability_set.intersection_update(options.ability_whitelist.value)
-        # Require rotate to be in pool
-        if not len({name for name in start_inventory_as_set|ability_set if "rotate" in item_data_table[name].tags}):
+        ability_set, _rotates = choose_abilities(options, start_inventory_as_set)
+        if _rotates:
             print(f"{world.player_name} (Dracomino): No rotate ability in pool, so adding them.")
-            _rotates = {name for name, item in item_data_table.items() if item.tags.issuperset({"rotate", "classic"})}
-            ability_set.update(_rotates)
             options.ability_whitelist.value.update(_rotates)
 
         blacklist:Set[str] = (
@@ -80,54 +158,52 @@ class DracominoItemPool:
         def _set_early_item(item_name:str):
             world.multiworld.early_items[world.player][item_name] = 1
         if options.early_rotate.value:
-            _rotates = [name for name, item in filtered_item_data_table.items() if "rotate" in item.tags]
+            _rotates = [name for name, item in filtered_item_data_table.items() if item.has_tags(TAG_ROTATE)]
             if len(_rotates):
                 _set_early_item(world.random.choice(_rotates))
         if options.early_second_drop.value:
-            _drops = [name for name, item in filtered_item_data_table.items() if "drop" in item.tags]
+            _drops = [name for name, item in filtered_item_data_table.items() if item.has_tags(TAG_DROP)]
             if len(_drops):
                 _set_early_item(world.random.choice(_drops))
 
-        # Build shape whitelist
-        whitelisted_shape_types = [shape_type for shape_type, weight in SHAPE_WEIGHTS.items() if weight]
+        whitelisted_shape_types = shape_plan.whitelisted_shape_types
         
         for name, item in filtered_item_data_table.items():
             # Progressive and tutorial items should be handled elsewhere
-            if not item.code or "progressive" in item.tags or "tutorial" in item.tags:
+            if not item.code or item.has_any_tags(TAG_PROGRESSIVE | TAG_TUTORIAL):
                 continue
             # Add abilites to the pool
-            if "ability" in item.tags:
+            if item.has_tags(TAG_ABILITY):
                 self.normal_itempool.append(name)
                 continue
-            # Sort other items types into groups
-            if "shape" in item.tags and len(item.tags.intersection(whitelisted_shape_types)):
-                self.shapes.append(name)
+            # Sort other items types into groups; shapes come from shape_plan
+            if item.has_tags(TAG_SHAPE):
                 continue
-            if "trap" in item.tags:
+            if item.has_tags(TAG_TRAP):
                 trap_items.append(name)
                 continue
 
-        # Make weighted list to pull types from
-        shape_type_weighted_list:List[str] = []
-        for shape_type in whitelisted_shape_types:
-            for _ in range(SHAPE_WEIGHTS[shape_type]):
-                shape_type_weighted_list.append(shape_type)
+        shape_type_weighted_list:List[str] = shape_plan.shape_type_weighted_list
 
         # Make shape generators to pull from
         shape_generators:Dict[str,ShapeGenerator] = {
-            **{
-                shape_type: ShapeGenerator([
-                    shape_name for shape_name in self.shapes if shape_type in item_data_table[shape_name].tags
-                ]) for shape_type in whitelisted_shape_types
-            }
+            shape_type: ShapeGenerator(SHAPES_BY_TYPE[shape_type]) for shape_type in whitelisted_shape_types
         }
         
         # Add starting shapes
+        starting_shape_names:List[str] = []
         for _ in range(options.starting_shapes.value):
             shape_type = world.random.choice(shape_type_weighted_list)
-            shape_name = shape_generators[shape_type].create(world)
-            world.multiworld.push_precollected(self.create_item(world, shape_name))
+            starting_shape_names.append(shape_generators[shape_type].create(world))
+        world.push_precollected_items(self.create_items_from_names(world, starting_shape_names))
                 
+        # Split the board into height bands, each its own region after Menu
+        if self.region_band_lines > 0:
+            # Nothing gets placed higher than this; see Regions.calc_item_pickup_location_interval
+            _height:int = options.goal.value + min(BOARD_HEIGHT>>1, options.max_stacking_height.value)
+            for _line in range(self.region_band_lines, _height, self.region_band_lines):
+                self.region_order.append(f"Lines {_line + 1}-{_line + self.region_band_lines}")
+
         # Calculate number of blocks so we have enough shapes to 
         num_blocks_to_fill:int = (options.goal.value + options.line_clear_leniency)*BOARD_WIDTH
 
@@ -143,37 +219,33 @@ class DracominoItemPool:
             self.normal_itempool.append("Hold Slot")
 
         # Create shapes until there's enough blocks filled plus extra shapes
-        num_extra_shapes = options.extra_shapes.value
+        def _add_shapes(count:int) -> int:
+            "Add shapes to the pool, returning their total block value"
+            _value:int = 0
+            for _ in range(count):
+                shape_type = world.random.choice(shape_type_weighted_list)
+                shape_name = shape_generators[shape_type].create(world)
+                self.normal_itempool.append(shape_name)
+                _value += SHAPE_VALUES[shape_type]
+            return _value
+
+        num_extra_shapes = max(0, options.extra_shapes.value)
         _num_shapes:int = 0
-        while num_blocks_to_fill > 0 or num_extra_shapes > 0:
-            shape_type = world.random.choice(shape_type_weighted_list)
-            shape_name = shape_generators[shape_type].create(world)
-            # Add shape to the pool and subtract its block value
-            self.normal_itempool.append(shape_name)
-            _num_shapes += 1
-            _shape_value = item_data_table[shape_name].shape_value
-            if num_blocks_to_fill > 0:
-                num_blocks_to_fill -= _shape_value
-            else:
-                num_extra_shapes -= 1
-
-        # Get weight of all shapes together
-        _shape_weight:int = 0
-        for v in SHAPE_WEIGHTS.values():
-            _shape_weight += v
+        # No shape fills more than this many blocks, so at least (blocks left / this) more shapes are needed.
+        # Adding that many at a time never goes past the point where the pool would have stopped filling blocks
+        _max_shape_value:int = shape_plan.max_shape_value
+        while num_blocks_to_fill > 0:
+            _batch:int = -(-num_blocks_to_fill//_max_shape_value)
+            num_blocks_to_fill -= _add_shapes(_batch)
+            _num_shapes += _batch
+        _add_shapes(num_extra_shapes)
+        _num_shapes += num_extra_shapes
+
         # Come up with number of traps to make
-        _traps_to_make:int = round(_num_shapes * options.trap_weight.value / _shape_weight)
-
-        # Create traps
-        trap_bag:List[str] = []
-        for trap_name in trap_items:
-            _num = RARITY_WEIGHTS["common"]
-            for k, v in RARITY_WEIGHTS.items():
-                if k in item_data_table[trap_name].tags:
-                    _num = v
-                    break
-            for _ in range(_num):
-                trap_bag.append(trap_name)
+        _traps_to_make:int = round(_num_shapes * options.trap_weight.value / shape_plan.total_weight)
+
+        # Create traps; the generator never changes the bag it refills from, so it can be shared
+        trap_bag:List[str] = Util.SharedOptionCache.get(("trap_bag", tuple(trap_items)), lambda: create_trap_bag(trap_items))
         trap_generator = ShapeGenerator(trap_bag)
         for _ in range(_traps_to_make):
             trap_name = trap_generator.create(world)
@@ -182,14 +254,9 @@ class DracominoItemPool:
 
         # Create tutorials (normal tutorials are twice as common as logic ones)
         tutorial_generator = ShapeGenerator(["Tutorial", "Tutorial", "Logic Tutorial"])
-        for i in range(options.tutorials.value):
-            # Guarantee first 2
-            if i == 0:
-                self.normal_itempool.append("Tutorial")
-            elif i == 1:
-                self.normal_itempool.append("Logic Tutorial")
-            else:
-                self.normal_itempool.append(tutorial_generator.create(world))
+        # Guarantee first 2
+        self.normal_itempool.extend(["Tutorial", "Logic Tutorial"][:options.tutorials.value])
+        self.normal_itempool.extend(tutorial_generator.draw_many(world, max(0, options.tutorials.value - 2)))
 
         # Count everything we have
         for item_name in self.normal_itempool:
@@ -206,49 +273,46 @@ class DracominoItemPool:
                 self.item_counts[_id] += 1
 
     def create_item(self, world:World, name: str) -> DracominoItem:
-        itemtype = (
-            item_data_table[name].type if name in item_name_to_id
-            else IC.progression
-        )
-        return DracominoItem(
-            name,
-            itemtype,
-            item_data_table[name].code if name in item_name_to_id else None,
-            world.player
-        )
+        classification, code = item_prototypes.get(name, event_item_prototype)
+        return DracominoItem(name, classification, code, world.player)
 
-    def create_items(self, world: World) -> None:
-        item_pool: List[DracominoItem] = []
-        items_to_put_in_pool: List[DracominoItem] = []
+    def create_items_from_names(self, world:World, names: Iterable[str]) -> List[DracominoItem]:
+        player = world.player
+        get_prototype = item_prototypes.get
+        return [DracominoItem(name, *get_prototype(name, event_item_prototype), player) for name in names]
 
-        # Create the items
+    def create_items(self, world: World) -> None:
+        # Abilities and stuff should always be in the item pool, while shapes should overflow into start inventory
+        shape_names: List[str] = []
+        other_names: List[str] = []
         for name in self.normal_itempool:
-             # Abilities and stuff should always be in the item pool, while shapes should overflow into start inventory
             (
-                items_to_put_in_pool if "shape" in item_data_table[name].tags
-                else item_pool
-            ).append(self.create_item(world, name))
-
-        unfilled_locations = world.multiworld.get_unfilled_locations(world.player)
-        num_total_locations_to_fill = len(unfilled_locations) - len(item_pool)
-
-        # Fill until we run out of locations
-        for _ in range(max(num_total_locations_to_fill, 0)):
-            if len(items_to_put_in_pool):
-                item_pool.append(items_to_put_in_pool.pop())
-            else:
-                break
+                shape_names if item_data_table[name].has_tags(TAG_SHAPE)
+                else other_names
+            ).append(name)
+
+        # Create the items
+        item_pool: List[DracominoItem] = self.create_items_from_names(world, other_names)
+        items_to_put_in_pool: List[DracominoItem] = self.create_items_from_names(world, shape_names)
+
+        # Nothing is placed before create_items, so every location created is unfilled
+        num_total_locations_to_fill = world.location_count - len(item_pool)
+
+        # Fill until we run out of locations, taking shapes from the end of the list
+        num_shapes_to_fill = min(max(num_total_locations_to_fill, 0), len(items_to_put_in_pool))
+        split = len(items_to_put_in_pool) - num_shapes_to_fill
+        item_pool.extend(reversed(items_to_put_in_pool[split:]))
+        del items_to_put_in_pool[split:]
 
         # TODO: I don't think is even possible to get this anymore
         # If we ran out of locations to put things, then remaining items will be added into starting inventory
         if len(items_to_put_in_pool):
             print("Pushing",len(items_to_put_in_pool),"items into start inventory. This is unintended, but shouldn't cause a problem.")
-        while len(items_to_put_in_pool):
-            item = items_to_put_in_pool.pop()
-            world.multiworld.push_precollected(item)
+            items_to_put_in_pool.reverse()
+            world.push_precollected_items(items_to_put_in_pool)
 
         # TODO: I don't think is even possible to get this anymore
-        if len(item_pool) > len(world.multiworld.get_unfilled_locations(world.player)):
+        if len(item_pool) > world.location_count:
             print(f"{world.multiworld.get_player_name(world.player)} (Dracomino): Warning! More items than locations!")
 
         world.multiworld.itempool += item_pool
@@ -1,7 +1,8 @@
-from typing import Dict, NamedTuple, Optional, Set
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
 
 from BaseClasses import Item, ItemClassification as IC
 from .Constants import ITEMS, SHAPE_VALUES
+from .Tags import get_tag_mask, TAG_SHAPE, TAG_ROTATE, TAG_ABILITY, TAG_HAS_CORNER_GAP, TAG_HAS_SECOND_TILE_GAP
 
 class DracominoItem(Item):
     game = "Dracomino"
@@ -13,6 +14,23 @@ class DracominoItemData(NamedTuple):
     shape_value:int = 0 # The number of blocks a shape is worth
     poor_height:int = 0 # The "worst case" amount of height a piece is expected to reach, when rotate is not available
     safe_height:int = 0 # A "safe" amount of height a piece is expected to reach, when rotate is available
+    tag_mask:int = 0 # Same as tags, as bits from Tags.get_tag_mask
+
+    def has_tags(self, mask:int) -> bool:
+        "Whether the item has all tags in the mask"
+        return self.tag_mask & mask == mask
+
+    def has_any_tags(self, mask:int) -> bool:
+        "Whether the item has any tag in the mask"
+        return bool(self.tag_mask & mask)
+
+class DracominoItemCounters(NamedTuple):
+    "Amounts an item adds to the counters kept in state"
+    shape_value:int = 0
+    poor_height:int = 0
+    safe_height:int = 0
+    corner_shapes:int = 0 # Shapes that can be placed in the bottom corner
+    second_tile_shapes:int = 0 # Shapes that can be placed one tile from the bottom corner
 
 def generate_item_map() -> Dict[str, DracominoItemData]:
     ret: Dict[str, DracominoItemData] = {}
@@ -42,25 +60,51 @@ def generate_item_map() -> Dict[str, DracominoItemData]:
         safe_height:int = v[5] if len(v) > 5 else 0
 
         if not "deprecated" in tags:
-            ret.setdefault(name, DracominoItemData(code, classification, tags, shape_value, poor_height, safe_height))
+            ret.setdefault(name, DracominoItemData(code, classification, tags, shape_value, poor_height, safe_height, get_tag_mask(tags)))
     return ret
 
 def generate_item_name_groups() -> Dict[str, Set[str]]:
+    def _with_tag(tag:str) -> Set[str]:
+        mask = get_tag_mask([tag])
+        return {k for k, v in item_data_table.items() if v.has_tags(mask)}
     ret:Dict[str, Set[str]] = {}
-    ret.setdefault("Tromino", {k for k, v in item_data_table.items() if "tromino" in v.tags})
-    ret.setdefault("Tetromino", {k for k, v in item_data_table.items() if "tetromino" in v.tags})
-    ret.setdefault("Pentomino", {k for k, v in item_data_table.items() if "pentomino" in v.tags})
-    ret.setdefault("Shape", {k for k, v in item_data_table.items() if "shape" in v.tags})
-    ret.setdefault("Rotate", {k for k, v in item_data_table.items() if "rotate" in v.tags})
+    ret.setdefault("Tromino", _with_tag("tromino"))
+    ret.setdefault("Tetromino", _with_tag("tetromino"))
+    ret.setdefault("Pentomino", _with_tag("pentomino"))
+    ret.setdefault("Shape", {k for k, v in item_data_table.items() if v.has_tags(TAG_SHAPE)})
+    ret.setdefault("Rotate", {k for k, v in item_data_table.items() if v.has_tags(TAG_ROTATE)})
     ret["Triomino"] = ret["Tromino"]
     ret["Piece"] = ret["Shape"]
     ret["Dracomino"] = ret["Shape"]
     ret["Mino"] = ret["Shape"]
     ret["Polyomino"] = ret["Shape"]
-    ret.setdefault("Ability", {k for k, v in item_data_table.items() if "ability" in v.tags})
+    ret.setdefault("Ability", {k for k, v in item_data_table.items() if v.has_tags(TAG_ABILITY)})
     return ret
     
 
 item_data_table: Dict[str, DracominoItemData] = generate_item_map()
 item_name_to_id = {name: data.code for name, data in item_data_table.items() if data.code is not None}
-item_name_groups:Dict[str, Set[str]] = generate_item_name_groups()
\ No newline at end of file
+# (classification, code) of each item, so items can be made without looking anything else up
+item_prototypes:Dict[str, Tuple[IC, Optional[int]]] = {name: (item_data_table[name].type, code) for name, code in item_name_to_id.items()}
+event_item_prototype:Tuple[IC, Optional[int]] = (IC.progression, None) # Anything without an ID is an event
+item_name_groups:Dict[str, Set[str]] = generate_item_name_groups()
+
+def generate_item_counter_deltas(shapes:Iterable[str]) -> Dict[int, DracominoItemCounters]:
+    "Items that change what's in logic when collected, by code. Only the given shapes count towards corner shapes"
+    shapes = set(shapes)
+    ret:Dict[int, DracominoItemCounters] = {}
+    for name, data in item_data_table.items():
+        # Rotate has no counters but still moves the frontier
+        if data.code is None or not (data.shape_value or data.poor_height or data.safe_height or data.has_tags(TAG_ROTATE)):
+            continue
+        can_be_placed:bool = data.has_tags(TAG_SHAPE) and name in shapes
+        ret[data.code] = DracominoItemCounters(
+            data.shape_value,
+            data.poor_height,
+            data.safe_height,
+            int(can_be_placed and not data.has_tags(TAG_HAS_CORNER_GAP)),
+            int(can_be_placed and not data.has_tags(TAG_HAS_SECOND_TILE_GAP)),
+        )
+    return ret
+
+item_counter_deltas:Dict[int, DracominoItemCounters] = generate_item_counter_deltas(item_name_groups["Shape"])
\ No newline at end of file
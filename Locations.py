@@ -1,8 +1,10 @@
-from typing import Dict, NamedTuple, Optional, Set
+from typing import Dict, FrozenSet, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from bisect import bisect_right
 
 from BaseClasses import Location
 
 from .Constants import LOCATIONS
+from .Tags import get_tag_mask
 
 class DracominoLocation(Location):
     game:str = "Dracomino"
@@ -11,18 +13,84 @@ class DracominoLocation(Location):
 
 class DracominoLocationData(NamedTuple):
     address: Optional[int] = None
-    tags: Set[str] = set()
+    tags: FrozenSet[str] = frozenset()
     name: str = ""
+    tag_mask: int = 0 # Same as tags, as bits from Tags.get_tag_mask
 
-def generate_location_data() -> Dict[str, DracominoLocationData]:
-    ret: Dict[str, DracominoLocationData] = {}
+    def has_tags(self, mask:int) -> bool:
+        "Whether the location has all tags in the mask"
+        return self.tag_mask & mask == mask
+
+    def has_any_tags(self, mask:int) -> bool:
+        "Whether the location has any tag in the mask"
+        return bool(self.tag_mask & mask)
+
+class DracominoLocationDataTable(Mapping[str, DracominoLocationData]):
+    """
+    Location data looked up by name. Entries are only created when first accessed,
+    and locations in the same run share their tags.
+    """
+    _runs:List[Tuple[int, int, FrozenSet[str], int]] # First id, count, tags, tag mask; sorted by first id
+    _run_starts:List[int]
+    _cache:Dict[str, DracominoLocationData]
+
+    def __init__(self):
+        self._runs = sorted((v[0], v[1], frozenset(v[3]), get_tag_mask(v[3])) for v in LOCATIONS)
+        self._run_starts = [run[0] for run in self._runs]
+        self._cache = {}
+
+    def __getitem__(self, name:str) -> DracominoLocationData:
+        data = self._cache.get(name)
+        if data is None:
+            address = location_name_to_id[name]
+            _, _, tags, tag_mask = self._runs[bisect_right(self._run_starts, address) - 1]
+            data = self._cache[name] = DracominoLocationData(address, tags, name, tag_mask)
+        return data
+
+    def __contains__(self, name:object) -> bool:
+        return name in location_name_to_id
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(location_name_to_id)
+
+    def __len__(self) -> int:
+        return len(location_name_to_id)
+
+def generate_location_name_to_id() -> Dict[str, int]:
+    ret:Dict[str, int] = {}
     for v in LOCATIONS:
-        address:int = v[0]
-        name:str = v[1]
-        tags:Set = set(v[3])
+        first:int = v[0]
+        count:int = v[1]
+        name_format:str = v[2]
+        ret.update(zip(map(name_format.format, range(1, count + 1)), range(first, first + count)))
+    return ret
+
+def generate_location_tag_index() -> Dict[str, List[Tuple[int, int, str]]]:
+    "Runs of locations with each tag, sorted by address"
+    ret:Dict[str, List[Tuple[int, int, str]]] = {}
+    for v in sorted(LOCATIONS, key=lambda v: v[0]):
+        for tag in v[3]:
+            ret.setdefault(tag, []).append((v[0], v[1], v[2]))
+    return ret
+
+def get_location_names_with_tag(tag:str, total:int) -> List[str]:
+    "Names of the first locations by address that have the tag, up to total"
+    ret:List[str] = []
+    for first, count, name_format in location_tag_index.get(tag, []):
+        if len(ret) >= total:
+            break
+        ret.extend(map(name_format.format, range(1, min(count, total - len(ret)) + 1)))
+    return ret
 
-        ret.setdefault(name, DracominoLocationData(address, tags, name))
+def get_location_addresses_with_tag(tag:str, total:int) -> List[int]:
+    "Addresses of the first locations by address that have the tag, up to total; matches get_location_names_with_tag"
+    ret:List[int] = []
+    for first, count, _ in location_tag_index.get(tag, []):
+        if len(ret) >= total:
+            break
+        ret.extend(range(first, first + min(count, total - len(ret))))
     return ret
 
-location_data_table: Dict[str, DracominoLocationData] = generate_location_data()
-location_name_to_id = {name: data.address for name, data in location_data_table.items() if data.address is not None}
\ No newline at end of file
+location_name_to_id:Dict[str, int] = generate_location_name_to_id()
+location_data_table:DracominoLocationDataTable = DracominoLocationDataTable()
+location_tag_index:Dict[str, List[Tuple[int, int, str]]] = generate_location_tag_index()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from Options import Toggle, DefaultOnToggle, Choice, Range, NamedRange, DeathLink, PerGameCommonOptions, OptionGroup, OptionSet
+from Options import Toggle, DefaultOnToggle, Choice, Range, NamedRange, DeathLink, PerGameCommonOptions, OptionGroup, OptionSet, Visibility
 from .Items import item_data_table
 
 class Goal(Range):
@@ -232,6 +232,26 @@ class LineClearLeniency(Range):
     range_start = 0
     range_end = 10
 
+class LogicTableInSlotData(Toggle):
+    """
+    Include what each coin needs to be in logic in slot data, so trackers can tell what's in logic
+    without recreating the seed.
+
+    This makes slot data bigger, so only turn it on if your tracker uses it.
+    """
+    display_name = "Logic Table in Slot Data"
+
+class HeightBandLines(Range):
+    """
+    Split locations into regions of this many lines of height, so generation only checks the locations of heights
+    that can be reached. This doesn't change what's in logic. If zero, every location is in one region.
+    """
+    display_name = "Height Band Lines"
+    visibility = Visibility.none
+    default = 0
+    range_start = 0
+    range_end = 100
+
 class DeathOnRestart(Toggle):
     """
     When Death Link is enabled, send a death whenever you reset your board
@@ -271,6 +291,8 @@ class DracominoOptions(PerGameCommonOptions):
     ability_whitelist: AbilityWhitelist
     line_clear_leniency: LineClearLeniency
     max_stacking_height: MaxStackingHeight
+    logic_table_in_slot_data: LogicTableInSlotData
+    height_band_lines: HeightBandLines
     trap_weight: TrapWeight
     tutorials: Tutorials
     death_link: DeathLink
@@ -306,6 +328,9 @@ dracomino_option_groups = [
         LineClearLeniency,
         MaxStackingHeight,
     ]),
+    OptionGroup("Tracker and Client Options", [
+        LogicTableInSlotData,
+    ]),
     OptionGroup("Link Options", [
         DeathLink,
         DeathOnRestart,
@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+from BaseClasses import CollectionState
+from worlds.AutoWorld import World
+from .Constants import VERSION
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Set this to anything but "" or "0" to write a profile report for each Dracomino slot
+PROFILE_ENV_VAR = "DRACOMINO_PROFILE"
+
+def is_profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+class DracominoStageProfile:
+    wall_time:float = 0.0 # Seconds
+    allocated:int = 0 # Bytes still allocated at the end of the stage
+    peak_allocated:int = 0 # Most bytes allocated at once during the stage
+    rule_calls:int = 0 # Rules evaluated during the stage
+    allocations_traced:bool = True # False for stages that can run alongside other worlds' output threads
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time":        self.wall_time,
+            # tracemalloc counts every thread's allocations, so they're left out when other threads could be running
+            "allocated":        self.allocated if self.allocations_traced else None,
+            "peak_allocated":   self.peak_allocated if self.allocations_traced else None,
+            "rule_calls":       self.rule_calls,
+        }
+
+class DracominoProfiler:
+    "Records time, allocations and rule calls for each generation stage of one slot"
+    stages:Dict[str, DracominoStageProfile]
+    rule_calls:Dict[str, int] # By location or entrance name
+    total_rule_calls:int
+    output_directory:Optional[str]
+    slot_data_done:bool
+    written:bool
+    write_lock:threading.Lock # generate_output and fill_slot_data run on different output threads
+
+    def __init__(self):
+        self.stages = {}
+        self.rule_calls = {}
+        self.total_rule_calls = 0
+        self.output_directory = None
+        self.slot_data_done = False
+        self.written = False
+        self.write_lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name:str, trace_allocations:bool = True) -> Iterator[None]:
+        """
+        Record a stage. tracemalloc counts allocations of every thread, so trace_allocations should be off for stages
+        that run while other worlds' output threads can be running.
+        """
+        profile = self.stages.setdefault(name, DracominoStageProfile())
+        if not trace_allocations:
+            profile.allocations_traced = False
+            start_rule_calls = self.total_rule_calls
+            start_time = time.perf_counter()
+            try:
+                yield
+            finally:
+                profile.wall_time += time.perf_counter() - start_time
+                profile.rule_calls += self.total_rule_calls - start_rule_calls
+            return
+        # Only trace allocations while in a stage, so the rest of generation isn't slowed down
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        start_allocated, _ = tracemalloc.get_traced_memory()
+        start_rule_calls = self.total_rule_calls
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.wall_time += time.perf_counter() - start_time
+            end_allocated, peak_allocated = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            profile.allocated += end_allocated - start_allocated
+            profile.peak_allocated = max(profile.peak_allocated, peak_allocated - start_allocated)
+            profile.rule_calls += self.total_rule_calls - start_rule_calls
+
+    def count_calls(self, name:str, rule:Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+        "Wrap a rule so its calls are counted under name"
+        self.rule_calls.setdefault(name, 0)
+        rule_calls = self.rule_calls
+        def counted_rule(state:CollectionState) -> bool:
+            rule_calls[name] += 1
+            self.total_rule_calls += 1
+            return rule(state)
+        return counted_rule
+
+    def count_rules(self, world:World) -> None:
+        "Count calls to every rule of the world's locations and entrances, and its completion condition"
+        for location in world.multiworld.get_locations(world.player):
+            location.access_rule = self.count_calls(location.name, location.access_rule)
+        for entrance in world.multiworld.get_entrances(world.player):
+            entrance.access_rule = self.count_calls(entrance.name, entrance.access_rule)
+        completion_condition = world.multiworld.completion_condition
+        completion_condition[world.player] = self.count_calls("Completion", completion_condition[world.player])
+
+    def create_report(self, world:World) -> Dict[str, Any]:
+        return {
+            "generator_version":    VERSION,
+            "player":               world.player,
+            "player_name":          world.player_name,
+            "goal":                 world.options.goal.value,
+            "stages":               {name: profile.to_dict() for name, profile in self.stages.items()},
+            "total_rule_calls":     self.total_rule_calls,
+            # Hottest rules first
+            "rule_calls":           dict(sorted(self.rule_calls.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+    def write_report(self, world:World) -> None:
+        "Write the report next to the spoiler once both the output directory and slot data are known"
+        with self.write_lock:
+            if self.written or self.output_directory is None or not self.slot_data_done:
+                return
+            self.written = True
+        file_name = f"{world.multiworld.get_out_file_name_base(world.player)}.dracomino_profile.json"
+        with open(os.path.join(self.output_directory, file_name), "w") as f:
+            json.dump(self.create_report(world), f, indent=2)
+
+def profiled_stage(name:str, trace_allocations:bool = True):
+    "Decorates a world method so its calls are recorded as a stage when profiling; see DracominoProfiler.stage"
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler:Optional[DracominoProfiler] = self.dracomino_profiler
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            with profiler.stage(name, trace_allocations):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
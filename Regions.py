@@ -1,17 +1,30 @@
 from typing import Dict, List, NamedTuple, Set, Callable, Optional
 from BaseClasses import MultiWorld, Region, Entrance, CollectionState
 from Options import OptionError
-from .Locations import location_data_table, DracominoLocation
+from .Locations import location_data_table, get_location_names_with_tag, DracominoLocation
 from .ItemPool import DracominoItemPool
 from .Options import DracominoOptions
 from .Constants import BOARD_WIDTH, BOARD_HEIGHT
 from . import Util
+from array import array
 import math
 
 class DracominoRegionData(NamedTuple):
     connecting_regions: List[str]
     locations: List[str]
 
+def calc_item_pickup_location_interval(goal:int, max_stacking_height:int, total_locations:int) -> float:
+    "Location shape value multiplier to spread out item pickups across the height"
+    HEIGHT_LIMIT = min(BOARD_HEIGHT>>1, max_stacking_height) # Extends placement vertically by half board height
+    item_pickup_locations = total_locations - (goal - 1)
+
+    average_interval = goal*BOARD_WIDTH/max(1, item_pickup_locations) # Stretches location distribution to fit goal region
+    height_extension_multiplier = (goal + HEIGHT_LIMIT)/goal # Extends the height limit of pickups above the goal line
+    return average_interval * height_extension_multiplier
+
+def get_too_little_space_message(player_name:str) -> str:
+    return f"{player_name} (Dracomino): Too little space for locations. Increase goal or decrease extra_shapes!"
+
 def create_regions(multiworld: MultiWorld, player: int, options:DracominoOptions, itempool:DracominoItemPool):
     world = multiworld.worlds[player]
     region_name_list: List[str] = ["Menu"]
@@ -20,7 +33,7 @@ def create_regions(multiworld: MultiWorld, player: int, options:DracominoOptions
     }
     
     # Build region table, each connected to the next
-    # TODO: Right now there's no extra regions, but keeping this code here in case I do need it??
+    # Regions are only added when locations are split into height bands
     for region_name in itempool.region_order:
         region_data_table[region_name] = DracominoRegionData([], [])
         region_name_list.append(region_name)
@@ -30,51 +43,55 @@ def create_regions(multiworld: MultiWorld, player: int, options:DracominoOptions
 
     location_shape_values_to_reach:Dict[str, int] = {}
     location_placements:Dict[str, int] = {}
-    def place_locations(location_type:str, total:int, placement_fn:Callable[[int], int]):
-        _eligible_locations:List[str] = [name for name, data in location_data_table.items() if location_type in data.tags]
-        _eligible_locations.sort(key = (lambda key: location_data_table[key].address), reverse=True)
+    def place_locations(location_type:str, total:int, placements_fn:Callable[[int], List[int]]) -> List[int]:
+        "Place up to total locations of the type, getting all their placements at once from placements_fn(count)"
+        _eligible_locations:List[str] = get_location_names_with_tag(location_type, total)
+        _placements:List[int] = placements_fn(len(_eligible_locations))
+        _shape_values_to_reach:List[int] = [placement - (placement % BOARD_WIDTH) for placement in _placements]
+        location_placements.update(zip(_eligible_locations, _placements))
+        location_shape_values_to_reach.update(zip(_eligible_locations, _shape_values_to_reach))
         _num_regions = len(region_name_list)
-        i:int = 0
-        while i < total and len(_eligible_locations):
-            _region_index = min(
-                _num_regions - 1,
-                math.floor(
-                    _num_regions*i/total
+        for i, (_location_name, placement) in enumerate(zip(_eligible_locations, _placements)):
+            if itempool.region_band_lines:
+                # Height bands; see Rules.create_band_rule
+                _region_index = min(
+                    _num_regions - 1,
+                    math.floor(placement/BOARD_WIDTH)//itempool.region_band_lines
+                )
+            else:
+                _region_index = min(
+                    _num_regions - 1,
+                    math.floor(
+                        _num_regions*i/total
+                    )
                 )
-            )
-            _location_name = _eligible_locations.pop()
-            placement = placement_fn(i)
-            location_placements[_location_name] = placement
-            location_shape_values_to_reach[_location_name] = placement - (placement % BOARD_WIDTH)
             region_data_table[region_name_list[_region_index]].locations.append(_location_name)
-            i += 1
+        return _placements
 
     LINE_GOAL = options.goal.value
     NUM_LINE_LOCATIONS = LINE_GOAL - 1
     # Place line-clear locations
-    place_locations("line_clear", NUM_LINE_LOCATIONS, lambda index: (index+1) * BOARD_WIDTH)
-
-    # Calculate location shape value multiplier to spread out item pickups across the height
-    def calc_item_pickup_location_interval() -> float:
-        HEIGHT_LIMIT = min(BOARD_HEIGHT>>1, options.max_stacking_height.value) # Extends placement vertically by half board height
-        total_locations = len(itempool.normal_itempool)
-        item_pickup_locations = total_locations - NUM_LINE_LOCATIONS
-
-        average_interval = LINE_GOAL*BOARD_WIDTH/max(1, item_pickup_locations) # Stretches location distribution to fit goal region
-        height_extension_multiplier = (LINE_GOAL + HEIGHT_LIMIT)/LINE_GOAL # Extends the height limit of pickups above the goal line
-        return average_interval * height_extension_multiplier
+    place_locations("line_clear", NUM_LINE_LOCATIONS, lambda count: [(index+1) * BOARD_WIDTH for index in range(count)])
 
     # Calculate how far item pickups are
-    _LOCATION_INTERVAL = calc_item_pickup_location_interval()
+    _LOCATION_INTERVAL = calc_item_pickup_location_interval(LINE_GOAL, options.max_stacking_height.value, len(itempool.normal_itempool))
     if _LOCATION_INTERVAL < 1.0:
         # If smaller than 1, pickups will overlap, and I rather them don't
-        raise OptionError(f"{world.player_name} (Dracomino): Too little space for locations. Increase goal or decrease extra_shapes!")
-    def item_pickup_shape_value(index:int) -> int:
-        # Randomize the position of each placement
-        return world.random.randint(math.floor(_LOCATION_INTERVAL*index), math.floor(_LOCATION_INTERVAL*(index+1))-1)
+        raise OptionError(get_too_little_space_message(world.player_name))
+    def item_pickup_placements(count:int) -> List[int]:
+        # Randomize the position of each placement within its interval, drawing them all in one go.
+        # randrange(width) makes the same draw as randint(low, low + width - 1), so seeds are unchanged
+        _bounds = [math.floor(_LOCATION_INTERVAL*index) for index in range(count + 1)]
+        _randrange = world.random.randrange
+        return [low + _randrange(high - low) for low, high in zip(_bounds, _bounds[1:])]
     
-    # Place item-pickup locations
-    place_locations("item_pickup", len(itempool.normal_itempool) - NUM_LINE_LOCATIONS, item_pickup_shape_value)
+    # Place item-pickup locations, keeping their placements in coin order for slot data
+    world.item_pickup_placements = place_locations("item_pickup", len(itempool.normal_itempool) - NUM_LINE_LOCATIONS, item_pickup_placements)
+    # Line each coin is on, for hints
+    world.item_pickup_lines = array("H", [placement//BOARD_WIDTH + 1 for placement in world.item_pickup_placements])
+
+    # Every location gets made below; create_items uses this instead of counting unfilled locations
+    world.location_count = sum(len(region_data.locations) for region_data in region_data_table.values())
 
     # Create regions
     for region_name in region_name_list:
@@ -1,4 +1,4 @@
-from typing import Dict, Set, Optional, Callable, List
+from typing import Any, Dict, Callable, List, NamedTuple, Counter
 
 from BaseClasses import CollectionState
 from worlds.generic.Rules import set_rule
@@ -6,128 +6,209 @@ from worlds.AutoWorld import World
 
 from .Locations import location_data_table, DracominoLocation
 from .Options import DracominoOptions
-from .Items import item_data_table
+from .Items import item_name_groups
 from .ItemPool import DracominoItemPool
-from .Constants import BOARD_WIDTH
+from .Constants import BOARD_WIDTH, BOARD_HEIGHT
+from .Tags import TAG_LINE_CLEAR, TAG_ITEM_PICKUP
 from . import Util
+from bisect import bisect_right
 import math
 
-class DracominoRule:
-    event:str
-    rule:Callable[[CollectionState], bool]
-    optional_rule:Callable[[CollectionState], bool]
-    optional_event:Callable[[CollectionState], bool]
-    is_progression:bool = True
-    is_rule:bool = True
-    def __init__(self, event:str, player:int):
-        self.event = f"(EVENT) {event}"
-        self.optional_event = self.event
-        self.rule = lambda state: state.has(self.event, player)
-        self.optional_rule = self.rule
-
-def ALWAYS_TRUE(state: CollectionState) -> bool:
-    return True
-
-def ALWAYS_FALSE(state: CollectionState) -> bool:
-    return False
-
-def combine_rules(*rules: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
-    for v in rules:
-        assert callable(v), v
-    if len(rules) == 1:
-        return rules[0]
-    a, b, *r = rules
-    if a == ALWAYS_FALSE or b == ALWAYS_FALSE:
-        return ALWAYS_FALSE
-    if a == ALWAYS_TRUE: return combine_rules(b, *r)
-    if b == ALWAYS_TRUE: return combine_rules(a, *r)
-    new_rule = lambda state: a(state) and b(state)
-    return combine_rules(new_rule, *r)
-
-def either_rule(*rules: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
-    for v in rules:
-        assert callable(v), v
-    if len(rules) == 1:
-        return rules[0]
-    a, b, *r = rules
-    if a == ALWAYS_TRUE or b == ALWAYS_TRUE:
-        return ALWAYS_TRUE
-    if a == ALWAYS_FALSE: return either_rule(b, *r)
-    if b == ALWAYS_FALSE: return either_rule(a, *r)
-    new_rule = lambda state: a(state) or b(state)
-    return either_rule(new_rule, *r)
+# How a location can be reached when the rotate requirement isn't met
+FALLBACK_NONE:int = 0           # Rotate is required
+FALLBACK_STACK:int = 1          # Stack with enough shape value and poor height
+FALLBACK_CORNER:int = 2         # Have any shape that fits in the bottom corner
+FALLBACK_SECOND_TILE:int = 3    # Have any shape that fits one tile from the bottom corner
 
-def set_rules(world: World, itempool:DracominoItemPool) -> None:
-    multiworld = world.multiworld
-    player = world.player
-    options:DracominoOptions = world.options
+ROTATE_ITEMS = tuple(sorted(item_name_groups["Rotate"]))
+
+# Counters kept in state by DracominoLogic.update_frontier
+PLACEMENT_FRONTIER:str = "Placement Frontier" # Coins placed below this are in logic, except for corner coins
+ROTATE_PLACEMENT_FRONTIER:str = "Rotate Placement Frontier" # Coins placed below this are in logic using rotate
+LINE_FRONTIER:str = "Line Frontier" # Lines up to this one are in logic
+
+class DracominoLogicSettings(NamedTuple):
+    "Option-derived values shared by all of a player's location rules"
+    max_stacking_height:int # Max stacking height capped by goal
+    height_limit:int # Highest row logic expects to be stacked to
+    has_only_monominos:bool
 
-    SHAPES_THAT_CAN_BE_PLACED_IN_CORNER = {shape_name for shape_name in itempool.shapes if not "has_corner_gap" in item_data_table[shape_name].tags}
-    SHAPES_THAT_CAN_BE_PLACED_ONE_TILE_FROM_CORNER = {shape_name for shape_name in itempool.shapes if not "has_second_tile_gap" in item_data_table[shape_name].tags}
+class DracominoRequirement(NamedTuple):
+    "Flattened access rule of a coin; see create_logic_table for how it's met"
+    needs_rotate:bool
+    shape_value:int # Shape Value needed when rotate is available
+    safe_height:int
+    fallback:int = FALLBACK_NONE
+    fallback_shape_value:int = 0 # Shape Value needed for FALLBACK_STACK
+    poor_height:int = 0
+
+def get_logic_settings(options:DracominoOptions) -> DracominoLogicSettings:
     SHAPE_TYPES = set(Util.get_shape_weights(options).keys())
-    HAS_ONLY_MONOMINOS = len(SHAPE_TYPES.difference({"monomino"})) == 0
-    
-    def can_rotate(state:CollectionState):
-        return state.has_group("Rotate", player)
-
-    def create_shape_value_rule(amount:int) -> Callable[[CollectionState], bool]:
-        return lambda state: state.has("Shape Value", player, amount)
-    
-    def create_poor_height_rule(amount:int) -> Callable[[CollectionState], bool]:
-        return lambda state: state.has("Poor Height", player, amount)
-    
-    def create_safe_height_rule(amount:int) -> Callable[[CollectionState], bool]:
-        return lambda state: state.has("Safe Height", player, amount)
-    
-    def create_item_pickup_rule(amount:int, placement:int) -> Callable[[CollectionState], bool]:
-        # TODO: Board Height Upgrades: This rule must be changed when there's board height upgrades
-        BOARD_HEIGHT_UPGRADES = 20
-        # Having stack height be as high the goal might cause problems with the randomizer resolving fills
-        ACTUAL_MAX_STACKING_HEIGHT = min(options.max_stacking_height.value, options.goal.value)
-        
-        height_limit:int = min(BOARD_HEIGHT_UPGRADES, ACTUAL_MAX_STACKING_HEIGHT) - 1 # Subtract one to make sure it's within the board
-        location_height = math.floor(placement/BOARD_WIDTH)
-        reach_height:int = min(height_limit, location_height)
-        SHAPE_VALUE_REDUCTION_WITH_ROTATIONS:int = reach_height*(BOARD_WIDTH - 2)
-        SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS:int = reach_height*(BOARD_WIDTH - 4)
-        
-        return either_rule(
-            # Rules when we have rotate
-            combine_rules(
-                ALWAYS_TRUE if HAS_ONLY_MONOMINOS else can_rotate,
-                create_shape_value_rule(1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITH_ROTATIONS)),
-                create_safe_height_rule(reach_height)
-            ),
-            # Need line clears to go any higher
-            ALWAYS_FALSE if location_height > ACTUAL_MAX_STACKING_HEIGHT
-            # Rotate is irrelevant for monominos
-            else ALWAYS_FALSE if HAS_ONLY_MONOMINOS
-            # Rules for bottom corners and minos with gaps
-            else (lambda state: state.has_any(SHAPES_THAT_CAN_BE_PLACED_IN_CORNER, player)) if placement == 1
-            else (lambda state: state.has_any(SHAPES_THAT_CAN_BE_PLACED_ONE_TILE_FROM_CORNER, player)) if placement == 2
-            else (lambda state: state.has_any(SHAPES_THAT_CAN_BE_PLACED_ONE_TILE_FROM_CORNER, player)) if placement == BOARD_WIDTH - 2
-            else (lambda state: state.has_any(SHAPES_THAT_CAN_BE_PLACED_IN_CORNER, player)) if placement == BOARD_WIDTH - 1
-            # Rule for everywhere else without rotate
-            else combine_rules(
-                create_shape_value_rule(1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS)),
-                create_poor_height_rule(reach_height)
+    return create_logic_settings(
+        options.goal.value,
+        options.max_stacking_height.value,
+        len(SHAPE_TYPES.difference({"monomino"})) == 0,
+    )
+
+def create_logic_settings(goal:int, max_stacking_height:int, has_only_monominos:bool) -> DracominoLogicSettings:
+    "Settings from option values, such as the ones in slot data"
+    # TODO: Board Height Upgrades: This must be changed when there's board height upgrades
+    BOARD_HEIGHT_UPGRADES = 20
+    # Having stack height be as high the goal might cause problems with the randomizer resolving fills
+    ACTUAL_MAX_STACKING_HEIGHT = min(max_stacking_height, goal)
+    return DracominoLogicSettings(
+        ACTUAL_MAX_STACKING_HEIGHT,
+        min(BOARD_HEIGHT_UPGRADES, ACTUAL_MAX_STACKING_HEIGHT) - 1, # Subtract one to make sure it's within the board
+        has_only_monominos,
+    )
+
+def compile_item_pickup_requirement(settings:DracominoLogicSettings, amount:int, placement:int) -> DracominoRequirement:
+    location_height = math.floor(placement/BOARD_WIDTH)
+    reach_height:int = min(settings.height_limit, location_height)
+    SHAPE_VALUE_REDUCTION_WITH_ROTATIONS:int = reach_height*(BOARD_WIDTH - 2)
+    SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS:int = reach_height*(BOARD_WIDTH - 4)
+
+    fallback:int = (
+        # Need line clears to go any higher
+        FALLBACK_NONE if location_height > settings.max_stacking_height
+        # Rotate is irrelevant for monominos
+        else FALLBACK_NONE if settings.has_only_monominos
+        # Rules for bottom corners and minos with gaps
+        else FALLBACK_CORNER if placement == 1
+        else FALLBACK_SECOND_TILE if placement == 2
+        else FALLBACK_SECOND_TILE if placement == BOARD_WIDTH - 2
+        else FALLBACK_CORNER if placement == BOARD_WIDTH - 1
+        # Rule for everywhere else without rotate
+        else FALLBACK_STACK
+    )
+    return DracominoRequirement(
+        not settings.has_only_monominos,
+        1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITH_ROTATIONS),
+        reach_height,
+        fallback,
+        1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS) if fallback == FALLBACK_STACK else 0,
+        reach_height if fallback == FALLBACK_STACK else 0,
+    )
+
+class DracominoLogic:
+    """
+    Per-row thresholds of a player's coin rules. Since a coin's requirements only ever go up with its row,
+    the rows in logic can be kept as a frontier that's updated whenever the counters change.
+    """
+    settings:DracominoLogicSettings
+    rotate_shape_values:List[int]
+    safe_heights:List[int]
+    stack_shape_values:List[int]
+    poor_heights:List[int]
+
+    def __init__(self, settings:DracominoLogicSettings, goal:int):
+        self.settings = settings
+        self.rotate_shape_values = []
+        self.safe_heights = []
+        self.stack_shape_values = []
+        self.poor_heights = []
+        # Coins are never placed this high
+        for row in range(goal + BOARD_HEIGHT):
+            requirement = compile_item_pickup_requirement(self.settings, row*BOARD_WIDTH, row*BOARD_WIDTH)
+            self.rotate_shape_values.append(requirement.shape_value)
+            self.safe_heights.append(requirement.safe_height)
+            if requirement.fallback == FALLBACK_STACK:
+                self.stack_shape_values.append(requirement.fallback_shape_value)
+                self.poor_heights.append(requirement.poor_height)
+
+    def update_frontier(self, counts:Counter[str]) -> None:
+        "Recalculate the frontiers from a player's counters in state"
+        shape_value = counts["Shape Value"]
+        rotate_rows:int = 0
+        line:int = 0
+        if self.settings.has_only_monominos or any(counts[name] for name in ROTATE_ITEMS):
+            rotate_rows = min(
+                bisect_right(self.rotate_shape_values, shape_value),
+                bisect_right(self.safe_heights, counts["Safe Height"]),
             )
+            line = shape_value//BOARD_WIDTH
+        stack_rows:int = min(
+            bisect_right(self.stack_shape_values, shape_value),
+            bisect_right(self.poor_heights, counts["Poor Height"]),
         )
-    
-    def create_line_clear_rule(amount:int) -> Callable[[CollectionState], bool]:
-        return combine_rules(
-            ALWAYS_TRUE if HAS_ONLY_MONOMINOS else can_rotate,
-            create_shape_value_rule(amount)
-        )
+        counts[ROTATE_PLACEMENT_FRONTIER] = rotate_rows*BOARD_WIDTH
+        counts[PLACEMENT_FRONTIER] = max(rotate_rows, stack_rows)*BOARD_WIDTH
+        counts[LINE_FRONTIER] = line
+
+def create_frontier_rule(requirement:DracominoRequirement, player:int, placement:int) -> Callable[[CollectionState], bool]:
+    "Coin rule using the frontiers kept by DracominoLogic"
+    if requirement.fallback == FALLBACK_CORNER or requirement.fallback == FALLBACK_SECOND_TILE:
+        shape_counter:str = "Corner Shapes" if requirement.fallback == FALLBACK_CORNER else "Second Tile Shapes"
+        def corner_rule(state:CollectionState) -> bool:
+            counts = state.prog_items[player]
+            return counts[ROTATE_PLACEMENT_FRONTIER] > placement or counts[shape_counter] > 0
+        return corner_rule
+    return lambda state: state.prog_items[player][PLACEMENT_FRONTIER] > placement
+
+def create_line_frontier_rule(player:int, amount:int) -> Callable[[CollectionState], bool]:
+    "Line clear rule using the frontier kept by DracominoLogic"
+    line:int = amount//BOARD_WIDTH
+    return lambda state: state.prog_items[player][LINE_FRONTIER] >= line
+
+def create_band_rule(player:int, line:int) -> Callable[[CollectionState], bool]:
+    """
+    Rule for entering the height band starting at this line (counting from 0), when locations are split into bands.
+    Every coin and line clear in or above the band needs at least this, so logic is the same as without bands.
+    """
+    placement:int = line*BOARD_WIDTH
+    def band_rule(state:CollectionState) -> bool:
+        counts = state.prog_items[player]
+        return counts[PLACEMENT_FRONTIER] > placement or counts[LINE_FRONTIER] >= line
+    return band_rule
+
+def create_logic_table(settings:DracominoLogicSettings, item_pickup_placements:List[int]) -> Dict[str, Any]:
+    """
+    Requirements of every coin in coin order, for trackers. Each field is a list packed with Util.pack_ints.
+    A coin is in logic when either:
+        - rotate is collected (or not needed), Shape Value >= shape_value and Safe Height >= safe_height
+        - fallback is FALLBACK_STACK, Shape Value >= fallback_shape_value and Poor Height >= poor_height
+        - fallback is FALLBACK_CORNER or FALLBACK_SECOND_TILE and a shape that fits there is collected
+    Line N Cleared is in logic when rotate is collected (or not needed) and Shape Value >= N * board width.
+    """
+    requirements = [
+        compile_item_pickup_requirement(settings, placement - (placement % BOARD_WIDTH), placement)
+        for placement in item_pickup_placements
+    ]
+    return {
+        "version":              1,
+        "needs_rotate":         not settings.has_only_monominos,
+        "shape_value":          Util.pack_ints(requirement.shape_value for requirement in requirements),
+        "safe_height":          Util.pack_ints(requirement.safe_height for requirement in requirements),
+        "fallback":             Util.pack_ints(requirement.fallback for requirement in requirements),
+        "fallback_shape_value": Util.pack_ints(requirement.fallback_shape_value for requirement in requirements),
+        "poor_height":          Util.pack_ints(requirement.poor_height for requirement in requirements),
+    }
+
+def set_rules(world: World, itempool:DracominoItemPool) -> None:
+    multiworld = world.multiworld
+    player = world.player
+    options:DracominoOptions = world.options
+    settings:DracominoLogicSettings = world.dracomino_logic.settings
 
     # Set location rules
     for location in multiworld.get_locations(player):
         if isinstance(location, DracominoLocation):
             location_data = location_data_table[location.name]
-            if "line_clear" in location_data.tags:
-                set_rule(location, create_line_clear_rule(location.shape_value_to_reach))
-            elif "item_pickup" in location_data.tags:
-                set_rule(location, create_item_pickup_rule(location.shape_value_to_reach, location.placement))
+            if location_data.has_tags(TAG_LINE_CLEAR):
+                set_rule(location, create_line_frontier_rule(player, location.shape_value_to_reach))
+            elif location_data.has_tags(TAG_ITEM_PICKUP):
+                set_rule(location, create_frontier_rule(
+                    compile_item_pickup_requirement(settings, location.shape_value_to_reach, location.placement),
+                    player,
+                    location.placement,
+                ))
+
+    # Set height band entrance rules
+    for i, region_name in enumerate(itempool.region_order, 1):
+        for entrance in world.get_region(region_name).entrances:
+            set_rule(entrance, create_band_rule(player, i*itempool.region_band_lines))
 
     # Set the win conditions
-    multiworld.completion_condition[player] = create_line_clear_rule((options.goal.value + options.line_clear_leniency.value) * BOARD_WIDTH)
\ No newline at end of file
+    multiworld.completion_condition[player] = create_line_frontier_rule(
+        player, (options.goal.value + options.line_clear_leniency.value) * BOARD_WIDTH
+    )
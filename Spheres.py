@@ -0,0 +1,104 @@
+from typing import Counter, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from collections import Counter as _Counter
+
+from BaseClasses import MultiWorld
+from worlds.AutoWorld import World
+
+from .Items import item_name_to_id, DracominoItemCounters
+from .Locations import get_location_names_with_tag
+from .Rules import (
+    DracominoLogic, compile_item_pickup_requirement,
+    FALLBACK_CORNER, FALLBACK_SECOND_TILE, PLACEMENT_FRONTIER, ROTATE_PLACEMENT_FRONTIER, LINE_FRONTIER,
+)
+from .Constants import BOARD_WIDTH
+
+class DracominoSpheres(NamedTuple):
+    locations:Dict[str, int] # Sphere each reachable location becomes reachable in
+    completion:Optional[int] # Sphere the goal becomes reachable in, if it does
+
+class DracominoSphereCalculator:
+    """
+    Works out the sphere every coin and line clear becomes reachable in, given the items a player receives each sphere.
+    Every rule is a threshold on counters that only go up as items are received, so this is one pass through the
+    spheres with a pointer into the coins sorted by placement and another into the lines.
+    """
+    logic:DracominoLogic
+    counter_deltas:Dict[int, DracominoItemCounters]
+    coins:List[Tuple[int, str]] # Placement and name, sorted by placement
+    corner_coins:List[Tuple[int, str, str]] # Placement, name and the counter that also reaches it
+    lines:List[str] # In order, so line n is at index n - 1
+    completion_line:int
+
+    def __init__(self, logic:DracominoLogic, counter_deltas:Dict[int, DracominoItemCounters], item_pickup_placements:List[int], num_lines:int, completion_line:int):
+        self.logic = logic
+        self.counter_deltas = counter_deltas
+        self.coins = []
+        self.corner_coins = []
+        coin_names = get_location_names_with_tag("item_pickup", len(item_pickup_placements))
+        for name, placement in zip(coin_names, item_pickup_placements):
+            requirement = compile_item_pickup_requirement(logic.settings, placement - (placement % BOARD_WIDTH), placement)
+            if requirement.fallback == FALLBACK_CORNER:
+                self.corner_coins.append((placement, name, "Corner Shapes"))
+            elif requirement.fallback == FALLBACK_SECOND_TILE:
+                self.corner_coins.append((placement, name, "Second Tile Shapes"))
+            else:
+                self.coins.append((placement, name))
+        self.coins.sort()
+        self.lines = get_location_names_with_tag("line_clear", num_lines)
+        self.completion_line = completion_line
+
+    @classmethod
+    def from_world(cls, world:World) -> "DracominoSphereCalculator":
+        "Calculator for a Dracomino world that has had its regions created"
+        return cls(
+            world.dracomino_logic,
+            world.item_counter_deltas,
+            world.item_pickup_placements,
+            world.options.goal.value - 1,
+            world.options.goal.value + world.options.line_clear_leniency.value,
+        )
+
+    def calculate(self, received:Iterable[Iterable[str]]) -> DracominoSpheres:
+        "Spheres of each location, given the names of items received at the start of each sphere; sphere 0 includes the starting inventory"
+        locations:Dict[str, int] = {}
+        completion:Optional[int] = None
+        counts:Counter[str] = _Counter()
+        coin_index:int = 0
+        line_index:int = 0
+        corner_coins = list(self.corner_coins)
+        for sphere, items in enumerate(received):
+            for name in items:
+                counts[name] += 1
+                deltas = self.counter_deltas.get(item_name_to_id.get(name))
+                if deltas:
+                    counts["Shape Value"] += deltas.shape_value
+                    counts["Poor Height"] += deltas.poor_height
+                    counts["Safe Height"] += deltas.safe_height
+                    counts["Corner Shapes"] += deltas.corner_shapes
+                    counts["Second Tile Shapes"] += deltas.second_tile_shapes
+            self.logic.update_frontier(counts)
+
+            while coin_index < len(self.coins) and self.coins[coin_index][0] < counts[PLACEMENT_FRONTIER]:
+                locations[self.coins[coin_index][1]] = sphere
+                coin_index += 1
+            for corner_coin in list(corner_coins):
+                placement, name, counter = corner_coin
+                if counts[ROTATE_PLACEMENT_FRONTIER] > placement or counts[counter] > 0:
+                    locations[name] = sphere
+                    corner_coins.remove(corner_coin)
+            while line_index < len(self.lines) and line_index + 1 <= counts[LINE_FRONTIER]:
+                locations[self.lines[line_index]] = sphere
+                line_index += 1
+            if completion is None and counts[LINE_FRONTIER] >= self.completion_line:
+                completion = sphere
+        return DracominoSpheres(locations, completion)
+
+def get_received_items_by_sphere(multiworld:MultiWorld, player:int) -> List[List[str]]:
+    "Names of the items a player receives at the start of each of the multiworld's spheres, for DracominoSphereCalculator"
+    received:List[List[str]] = [[item.name for item in multiworld.precollected_items[player]]]
+    for sphere in multiworld.get_spheres():
+        # An empty sphere is followed by the unreachable locations
+        if not sphere:
+            break
+        received.append([location.item.name for location in sphere if location.item and location.item.player == player])
+    return received
@@ -0,0 +1,33 @@
+from typing import Dict, Iterable
+from .Constants import ITEMS, LOCATIONS, RARITY_WEIGHTS
+
+# Each tag in the item and location tables gets its own bit, in the order tags are first seen.
+# Rarities are known tags too, even the ones no item has
+tag_bits:Dict[str, int] = {}
+for _tags in [*(v[3] for v in ITEMS), *(v[3] for v in LOCATIONS), RARITY_WEIGHTS]:
+    for _tag in _tags:
+        if _tag not in tag_bits:
+            tag_bits[_tag] = 1 << len(tag_bits)
+
+def get_tag_mask(tags:Iterable[str]) -> int:
+    "Combine the bits of the tags into a mask; raises KeyError for a tag that isn't known, so misspellings don't go unnoticed"
+    mask:int = 0
+    for tag in tags:
+        bit = tag_bits.get(tag)
+        if bit is None:
+            raise KeyError(f"Unknown Dracomino tag \"{tag}\"")
+        mask |= bit
+    return mask
+
+# Tags checked often
+TAG_ABILITY:int = get_tag_mask(["ability"])
+TAG_PROGRESSIVE:int = get_tag_mask(["progressive"])
+TAG_TUTORIAL:int = get_tag_mask(["tutorial"])
+TAG_TRAP:int = get_tag_mask(["trap"])
+TAG_SHAPE:int = get_tag_mask(["shape"])
+TAG_ROTATE:int = get_tag_mask(["rotate"])
+TAG_DROP:int = get_tag_mask(["drop"])
+TAG_HAS_CORNER_GAP:int = get_tag_mask(["has_corner_gap"])
+TAG_HAS_SECOND_TILE_GAP:int = get_tag_mask(["has_second_tile_gap"])
+TAG_LINE_CLEAR:int = get_tag_mask(["line_clear"])
+TAG_ITEM_PICKUP:int = get_tag_mask(["item_pickup"])
@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, TypeVar
 from .Options import DracominoOptions
+import base64
 
 def get_shape_weights(options: DracominoOptions) -> Dict[str, int]:
     return {
@@ -8,4 +9,60 @@ def get_shape_weights(options: DracominoOptions) -> Dict[str, int]:
         "tromino":   options.tromino_weight.value,
         "tetromino": options.tetromino_weight.value,
         "pentomino": options.pentomino_weight.value,
-    }
\ No newline at end of file
+    }
+
+T = TypeVar("T")
+
+class SharedOptionCache:
+    "Option-derived data shared by every slot with the same options. Cleared once every slot's generate_early is done"
+    values: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def get(cls, key: Hashable, create: Callable[[], T]) -> T:
+        "Get the value for key, creating it if no slot has yet. Values are shared, so they must never be changed"
+        if key in cls.values:
+            return cls.values[key]
+        value = cls.values[key] = create()
+        return value
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.values.clear()
+
+_line_hints: Dict[int, str] = {}
+def get_line_hint(line: int) -> str:
+    "Hint text for coins on a line, shared by every coin on it"
+    hint = _line_hints.get(line)
+    if hint is None:
+        hint = _line_hints[line] = f"Line {line}"
+    return hint
+
+def pack_ints(values: Iterable[int]) -> str:
+    "Pack integers as base64 varints of the difference from the previous one (zigzag encoded, so they can go down too)"
+    data = bytearray()
+    previous = 0
+    for value in values:
+        delta = value - previous
+        previous = value
+        zigzag = delta*2 if delta >= 0 else -delta*2 - 1
+        while zigzag > 0x7F:
+            data.append((zigzag & 0x7F) | 0x80)
+            zigzag >>= 7
+        data.append(zigzag)
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+def unpack_ints(packed: str) -> List[int]:
+    "Reverse of pack_ints"
+    ret: List[int] = []
+    previous = 0
+    zigzag = 0
+    shift = 0
+    for byte in base64.b64decode(packed):
+        zigzag |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            previous += zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+            ret.append(previous)
+            zigzag = 0
+            shift = 0
+    return ret
@@ -1,12 +1,13 @@
-from typing import Dict, Set, List, Iterable
+from typing import Dict, Set, List, Iterable, Counter, Optional
 
 from worlds.AutoWorld import World, WebWorld
 from .Options import DracominoOptions, dracomino_option_presets, dracomino_option_groups
-from . import Regions, Rules, ItemPool, Util
-from .Constants import VERSION, MIN_GAME_VERSION, BOARD_WIDTH
-from .Locations import DracominoLocation, location_data_table, location_name_to_id
-from .Items import item_data_table, item_name_to_id, item_name_groups, DracominoItem
-import math
+from . import Regions, Rules, ItemPool, Util, Feasibility
+from .Profiler import DracominoProfiler, is_profiling_enabled, profiled_stage
+from .Constants import VERSION, MIN_GAME_VERSION
+from .Locations import location_name_to_id, get_location_addresses_with_tag
+from .Items import item_name_to_id, item_name_groups, item_counter_deltas, generate_item_counter_deltas, DracominoItemCounters
+from array import array
 
 from BaseClasses import Item, Tutorial, CollectionState
 
@@ -40,11 +41,30 @@ class DracominoWorld(World):
     web = DracominoWeb()
 
     dracomino_itempool: ItemPool.DracominoItemPool
+    dracomino_logic: Rules.DracominoLogic
+    item_counter_deltas: Dict[int, DracominoItemCounters]
+    item_pickup_placements: List[int] # Placement of each coin in coin order; set by create_regions
+    item_pickup_lines: array # Line number of each coin in coin order; set by create_regions
+    location_count: int # Number of locations this world has; set by create_regions
+    dracomino_profiler: Optional[DracominoProfiler] # Set when profiling; see Profiler.PROFILE_ENV_VAR
 
     def __init__(self, multiworld, player):
         self.dracomino_itempool = ItemPool.DracominoItemPool()
+        self.item_counter_deltas = item_counter_deltas
+        self.dracomino_profiler = None
+        if is_profiling_enabled():
+            self.dracomino_profiler = DracominoProfiler()
+            # Only override generate_output when profiling, so that otherwise AP can skip it like for any world without output
+            self.generate_output = self.write_profile_output
         super().__init__(multiworld, player)
 
+    @classmethod
+    def stage_generate_early(cls, multiworld) -> None:
+        # Runs after every slot's generate_early. The cache is only read in generate_early,
+        # so it can be dropped here instead of being kept around for the rest of the process
+        Util.SharedOptionCache.clear()
+
+    @profiled_stage("generate_early")
     def generate_early(self):
         # Check that anything has a weight
         SHAPE_WEIGHTS = Util.get_shape_weights(self.options)
@@ -58,69 +78,136 @@ class DracominoWorld(World):
         if not has_weight:
             self.options.tetromino_weight.value = 1
 
+        # Fail before building anything if no item pool could fit
+        Feasibility.check_feasibility(self.options, self.player_name)
+
+        # Thresholds for tracking what's in logic as items are collected, shared by slots with the same settings
+        logic_settings = Rules.get_logic_settings(self.options)
+        goal = self.options.goal.value
+        self.dracomino_logic = Util.SharedOptionCache.get(
+            ("logic", logic_settings, goal), lambda: Rules.DracominoLogic(logic_settings, goal)
+        )
+
         # Create itempools
         self.dracomino_itempool.decide_itempools(self)
+        # Only shapes in the pool count as corner shapes
+        shapes = self.dracomino_itempool.shapes
+        self.item_counter_deltas = Util.SharedOptionCache.get(
+            ("item_counter_deltas", frozenset(shapes)), lambda: generate_item_counter_deltas(shapes)
+        )
 
     def create_item(self, name: str) -> Item:
         return self.dracomino_itempool.create_item(self, name)
 
+    @profiled_stage("create_items")
     def create_items(self) -> None:
         self.dracomino_itempool.create_items(self)
 
     def get_filler_item_name(self) -> str:
         return self.dracomino_itempool.get_filler_item_name(self)
 
+    @profiled_stage("create_regions")
     def create_regions(self):
         Regions.create_regions(self.multiworld, self.player, self.options, self.dracomino_itempool)
 
+    @profiled_stage("set_rules")
     def set_rules(self) -> None:
         Rules.set_rules(self, self.dracomino_itempool)
+        if self.dracomino_profiler:
+            self.dracomino_profiler.count_rules(self)
 
     def collect(self, state: CollectionState, item: Item) -> bool:
         change = super().collect(state, item)
-        if change and isinstance(item, DracominoItem) and item.name in item_data_table:
-            # Keep track of the number of blocks in state
-            state.prog_items[item.player]["Shape Value"] += item_data_table[item.name].shape_value
-            state.prog_items[item.player]["Poor Height"] += item_data_table[item.name].poor_height
-            state.prog_items[item.player]["Safe Height"] += item_data_table[item.name].safe_height
+        if change:
+            deltas = self.item_counter_deltas.get(item.code)
+            if deltas:
+                # Keep track of the number of blocks in state
+                counts = state.prog_items[self.player]
+                counts["Shape Value"] += deltas.shape_value
+                counts["Poor Height"] += deltas.poor_height
+                counts["Safe Height"] += deltas.safe_height
+                counts["Corner Shapes"] += deltas.corner_shapes
+                counts["Second Tile Shapes"] += deltas.second_tile_shapes
+                self.dracomino_logic.update_frontier(counts)
         return change
 
     def remove(self, state: CollectionState, item: Item) -> bool:
         change = super().remove(state, item)
-        if change and isinstance(item, DracominoItem) and item.name in item_data_table:
-            # Keep track of the number of blocks in state
-            state.prog_items[item.player]["Shape Value"] -= item_data_table[item.name].shape_value
-            state.prog_items[item.player]["Poor Height"] -= item_data_table[item.name].poor_height
-            state.prog_items[item.player]["Safe Height"] -= item_data_table[item.name].safe_height
+        if change:
+            deltas = self.item_counter_deltas.get(item.code)
+            if deltas:
+                # Keep track of the number of blocks in state
+                counts = state.prog_items[self.player]
+                counts["Shape Value"] -= deltas.shape_value
+                counts["Poor Height"] -= deltas.poor_height
+                counts["Safe Height"] -= deltas.safe_height
+                counts["Corner Shapes"] -= deltas.corner_shapes
+                counts["Second Tile Shapes"] -= deltas.second_tile_shapes
+                self.dracomino_logic.update_frontier(counts)
+        return change
+
+    def collect_items(self, state: CollectionState, items: Iterable[Item]) -> bool:
+        "Collect many items at once, applying their counters in one pass"
+        change = False
+        shape_value = poor_height = safe_height = corner_shapes = second_tile_shapes = 0
+        for item in items:
+            # Skip this world's collect so the frontier is only updated once
+            if World.collect(self, state, item):
+                change = True
+                deltas = self.item_counter_deltas.get(item.code)
+                if deltas:
+                    shape_value += deltas.shape_value
+                    poor_height += deltas.poor_height
+                    safe_height += deltas.safe_height
+                    corner_shapes += deltas.corner_shapes
+                    second_tile_shapes += deltas.second_tile_shapes
+        if change:
+            counts:Counter[str] = state.prog_items[self.player]
+            counts["Shape Value"] += shape_value
+            counts["Poor Height"] += poor_height
+            counts["Safe Height"] += safe_height
+            counts["Corner Shapes"] += corner_shapes
+            counts["Second Tile Shapes"] += second_tile_shapes
+            self.dracomino_logic.update_frontier(counts)
+            state.stale[self.player] = True
         return change
-    
+
+    def push_precollected_items(self, items: List[Item]) -> None:
+        "MultiWorld.push_precollected for a batch of this player's items"
+        for item in items:
+            self.multiworld.push_precollected(item)
+
+    # Runs while other worlds' generate_output can be running
+    @profiled_stage("extend_hint_information", trace_allocations=False)
     def extend_hint_information(self, hint_data: Dict[int, Dict[int, str]]):
         # Tell which line each item pickup is on
-        hint_information:Dict[int, str] = {}
-        for location in self.multiworld.get_locations(self.player):
-            if isinstance(location, DracominoLocation):
-                if "item_pickup" in location_data_table[location.name].tags:
-                    line_num = math.floor(location.placement/BOARD_WIDTH) + 1
-                    hint_information[location.address] = f"Line {line_num}"
-        hint_data[self.player] = hint_information
+        addresses = get_location_addresses_with_tag("item_pickup", len(self.item_pickup_lines))
+        hint_data[self.player] = dict(zip(addresses, map(Util.get_line_hint, self.item_pickup_lines)))
+
+    def write_profile_output(self, output_directory: str) -> None:
+        "Used as generate_output when profiling"
+        self.dracomino_profiler.output_directory = output_directory
+        self.dracomino_profiler.write_report(self)
 
     def fill_slot_data(self):
+        slot_data = self.create_slot_data()
+        if self.dracomino_profiler:
+            self.dracomino_profiler.slot_data_done = True
+            self.dracomino_profiler.write_report(self)
+        return slot_data
+
+    # Runs while other worlds' generate_output can be running
+    @profiled_stage("fill_slot_data", trace_allocations=False)
+    def create_slot_data(self):
         # Create item placement data
-        item_pickup_placements:List[int] = []
-        EXISTING_LOCATIONS = {location.name for location in self.multiworld.get_locations(self.player)}
-        i = 1
-        while f"Coin {i}" in EXISTING_LOCATIONS:
-            location = self.get_location(f"Coin {i}")
-            if isinstance(location, DracominoLocation):
-                item_pickup_placements.append(location.placement)
-            else:
-                break
-            i += 1
+        item_pickup_placements:List[int] = self.item_pickup_placements
         # DEBUG: Check that there's no dupes
+        _seen_placements:Set[int] = set()
         for v in item_pickup_placements:
             # Keep this here a little longer so I can be sure it doesn't happen anymore
-            assert item_pickup_placements.count(v) == 1, \
+            assert not v in _seen_placements, \
                 f"{self.player_name} (Dracomino) Found multiple location placement {v} in slot data; {item_pickup_placements}; Report to dev if seeing this!"
+            _seen_placements.add(v)
         slot_data = {
             "generator_version":        VERSION,
             "min_game_version":         MIN_GAME_VERSION,
@@ -137,4 +224,6 @@ class DracominoWorld(World):
             "line_clear_leniency":      self.options.line_clear_leniency.value,
             "max_stacking_height":      self.options.max_stacking_height.value,
         }
+        if self.options.logic_table_in_slot_data.value:
+            slot_data["logic_table"] = Rules.create_logic_table(self.dracomino_logic.settings, item_pickup_placements)
         return slot_data
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Benchmarks for Dracomino generation. These need an Archipelago checkout and are run from its root, for example:
+    python -m worlds.dracomino.benchmarks.region_bands
+"""
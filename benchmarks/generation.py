@@ -0,0 +1,121 @@
+"""
+Times every Dracomino generation stage on the stand-in multiworld, across goals, shape presets and slot counts.
+
+    python -m worlds.dracomino.benchmarks.generation
+    python -m worlds.dracomino.benchmarks.generation --goals 100 500 --slots 1 10 --presets "Classic Tetrominos"
+
+Stage timings and peak memory come from Profiler, so they include tracemalloc's overhead.
+Profiler doesn't trace memory for extend_hint_information and fill_slot_data, so those show 0 bytes.
+Rule calls are every location and entrance rule evaluated during the stages and the sweep.
+Items are placed ignoring logic, so most larger seeds won't be beatable; that only matters to how far the sweep gets.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from Options import OptionError
+
+from .. import DracominoWorld
+from ..Options import dracomino_option_presets
+from ..Profiler import DracominoProfiler
+from .standin import StandInMultiWorld, StandInCollectionState, run_stages
+
+GOALS:List[int] = [10, 100, 500, 1000]
+PRESETS:List[str] = list(dracomino_option_presets)
+SLOTS:List[int] = [1, 10, 50]
+SEED:int = 1
+STAGES:List[str] = ["generate_early", "create_regions", "create_items", "set_rules", "extend_hint_information", "fill_slot_data"]
+
+def create_world(multiworld:StandInMultiWorld, player:int, option_values:Dict[str, Any]) -> DracominoWorld:
+    world = DracominoWorld(multiworld, player)
+    world.options = DracominoWorld.options_dataclass(**{
+        name: option.from_any(option_values.get(name, option.default))
+        for name, option in DracominoWorld.options_dataclass.type_hints.items()
+    })
+    world.dracomino_profiler = DracominoProfiler()
+    return world
+
+def generate(slots:int, seed:int, **option_values:Any) -> Dict[str, Any]:
+    "Run a full generation of Dracomino slots with the same options, then sweep it"
+    multiworld = StandInMultiWorld(slots, seed)
+    for player in multiworld.player_ids:
+        multiworld.worlds[player] = create_world(multiworld, player, option_values)
+    worlds:List[DracominoWorld] = list(multiworld.worlds.values())
+
+    run_stages(multiworld, worlds, ["generate_early", "create_regions", "create_items", "set_rules"])
+
+    start = time.perf_counter()
+    multiworld.fill_randomly()
+    fill_seconds = time.perf_counter() - start
+
+    hint_data:Dict[int, Dict[int, str]] = {}
+    for world in worlds:
+        world.extend_hint_information(hint_data)
+        world.fill_slot_data()
+
+    state = StandInCollectionState(multiworld)
+    start = time.perf_counter()
+    state.sweep()
+    sweep_seconds = time.perf_counter() - start
+
+    profilers:List[DracominoProfiler] = [world.dracomino_profiler for world in worlds]
+    return {
+        "locations":        sum(world.location_count for world in worlds),
+        # Summed over slots
+        "stage_seconds":    {stage: sum(profiler.stages[stage].wall_time for profiler in profilers) for stage in STAGES},
+        # Highest of any slot
+        "stage_peak_bytes": {stage: max(profiler.stages[stage].peak_allocated for profiler in profilers) for stage in STAGES},
+        "fill_seconds":     fill_seconds,
+        "sweep_seconds":    sweep_seconds,
+        "sweeps":           state.sweeps,
+        "rule_calls":       sum(profiler.total_rule_calls for profiler in profilers),
+        "beatable":         all(state.has_beaten_game(player) for player in multiworld.player_ids),
+    }
+
+def run(goals:List[int] = GOALS, presets:List[str] = PRESETS, slots:List[int] = SLOTS, seed:int = SEED) -> List[Dict[str, Any]]:
+    results:List[Dict[str, Any]] = []
+    for goal in goals:
+        for preset in presets:
+            for num_slots in slots:
+                result:Dict[str, Any] = {"goal": goal, "preset": preset, "slots": num_slots}
+                try:
+                    result.update(generate(num_slots, seed, **dracomino_option_presets[preset], goal=goal))
+                except OptionError as e:
+                    result["error"] = str(e)
+                results.append(result)
+    return results
+
+def format_result(result:Dict[str, Any]) -> str:
+    row = f"{result['goal']:>6} {result['preset']:<20} {result['slots']:>5}"
+    if "error" in result:
+        return f"{row} {result['error']}"
+    stages = "".join(f"{result['stage_seconds'][stage]*1000:>10.1f}" for stage in STAGES)
+    peak_kib = max(result["stage_peak_bytes"].values())/1024
+    return f"{row}{stages}{result['sweep_seconds']*1000:>10.1f}{peak_kib:>10.0f}{result['sweeps']:>7}{result['rule_calls']:>11} {result['beatable']}"
+
+def main(args:Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Dracomino generation on a stand-in multiworld")
+    parser.add_argument("--goals", type=int, nargs="+", default=GOALS)
+    parser.add_argument("--presets", nargs="+", default=PRESETS, choices=PRESETS)
+    parser.add_argument("--slots", type=int, nargs="+", default=SLOTS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parsed = parser.parse_args(args)
+
+    # Shortened stage names for the table
+    header = "".join(f"{stage[:9]:>10}" for stage in STAGES)
+    print(f"{'goal':>6} {'preset':<20} {'slots':>5}{header}{'sweep':>10}{'peak KiB':>10}{'sweeps':>7}{'rule calls':>11} beatable")
+    results:List[Dict[str, Any]] = []
+    for goal in parsed.goals:
+        for preset in parsed.presets:
+            for num_slots in parsed.slots:
+                result = run([goal], [preset], [num_slots], parsed.seed)[0]
+                print(format_result(result), flush=True)
+                results.append(result)
+    if parsed.json:
+        with open(parsed.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
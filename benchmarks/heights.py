@@ -0,0 +1,99 @@
+"""
+Compares how high Rules thinks a set of shapes can reach against how high the board simulator actually gets them.
+
+    python -m worlds.dracomino.benchmarks.heights
+    python -m worlds.dracomino.benchmarks.heights --samples 200 --beam-width 4
+
+For each shape on its own and for random mixes of every shape, random draws of the shapes are dropped
+aiming for a column in the middle of the board. "over" counts orders where Rules puts a higher row in logic
+than the simulator reached, which is the case that matters: those coins would be in logic but out of reach.
+Only rows within the stacking height are compared, since the search aims for height rather than line clears.
+"""
+import argparse
+import random
+import time
+from typing import Counter, List, Optional, Sequence
+
+from ..Board import SHAPE_CELLS, simulate
+from ..Constants import BOARD_WIDTH, BOARD_HEIGHT
+from ..Items import item_counter_deltas, item_name_to_id
+from ..Options import Goal
+from ..Rules import (
+    DracominoLogicSettings, DracominoRequirement, compile_item_pickup_requirement, create_logic_settings,
+    FALLBACK_STACK, FALLBACK_CORNER, FALLBACK_SECOND_TILE,
+)
+
+COLUMN:int = BOARD_WIDTH//2
+SAMPLES:int = 50
+PIECES:int = 12
+SEED:int = 1
+
+def meets_requirement(requirement:DracominoRequirement, counts:Counter[str], rotate:bool) -> bool:
+    "Whether the counters meet a coin's requirement, as described in Rules.create_logic_table"
+    if ((rotate or not requirement.needs_rotate) and counts["Shape Value"] >= requirement.shape_value
+            and counts["Safe Height"] >= requirement.safe_height):
+        return True
+    if requirement.fallback == FALLBACK_STACK:
+        return counts["Shape Value"] >= requirement.fallback_shape_value and counts["Poor Height"] >= requirement.poor_height
+    if requirement.fallback == FALLBACK_CORNER:
+        return counts["Corner Shapes"] > 0
+    if requirement.fallback == FALLBACK_SECOND_TILE:
+        return counts["Second Tile Shapes"] > 0
+    return False
+
+def predicted_reach(shapes:Sequence[str], column:int, rotate:bool, settings:DracominoLogicSettings) -> int:
+    "Highest row of the column whose coin Rules would put in logic with these shapes"
+    counts:Counter[str] = Counter()
+    for shape in shapes:
+        deltas = item_counter_deltas[item_name_to_id[shape]]
+        counts["Shape Value"] += deltas.shape_value
+        counts["Poor Height"] += deltas.poor_height
+        counts["Safe Height"] += deltas.safe_height
+        counts["Corner Shapes"] += deltas.corner_shapes
+        counts["Second Tile Shapes"] += deltas.second_tile_shapes
+    row = 0
+    while meets_requirement(compile_item_pickup_requirement(settings, row*BOARD_WIDTH, row*BOARD_WIDTH + column), counts, rotate):
+        row += 1
+    return row - 1
+
+def compare(name:str, shape_pool:List[str], rotate:bool, settings:DracominoLogicSettings,
+            samples:int, pieces:int, beam_width:int, rng:random.Random) -> int:
+    "Print one row of the comparison; returns placements tried"
+    predicted:List[int] = []
+    simulated:List[int] = []
+    placements = 0
+    for _ in range(samples):
+        shapes = [rng.choice(shape_pool) for _ in range(pieces)]
+        predicted.append(min(settings.height_limit, predicted_reach(shapes, COLUMN, rotate, settings)))
+        result = simulate(shapes, COLUMN, rotate, beam_width)
+        simulated.append(result.reach)
+        placements += result.placements
+    over = sum(1 for p, s in zip(predicted, simulated) if p > s)
+    print(f"{name:<14} {'yes' if rotate else 'no':>6} {sum(predicted)/samples:>10.1f} {min(simulated):>8} {sum(simulated)/samples:>9.1f} {over:>6}")
+    return placements
+
+def main(args:Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check Dracomino's height heuristics against a board simulator")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--pieces", type=int, default=PIECES)
+    parser.add_argument("--beam-width", type=int, default=1)
+    parser.add_argument("--goal", type=int, default=Goal.default)
+    parser.add_argument("--max-stacking-height", type=int, default=BOARD_HEIGHT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parsed = parser.parse_args(args)
+
+    settings = create_logic_settings(parsed.goal, parsed.max_stacking_height, False)
+    rng = random.Random(parsed.seed)
+    placements = 0
+    start = time.perf_counter()
+    print(f"{'shapes':<14} {'rotate':>6} {'predicted':>10} {'sim min':>8} {'sim mean':>9} {'over':>6}")
+    for name in SHAPE_CELLS:
+        for rotate in (True, False):
+            placements += compare(name, [name], rotate, settings, parsed.samples, parsed.pieces, parsed.beam_width, rng)
+    for rotate in (True, False):
+        placements += compare("All shapes", list(SHAPE_CELLS), rotate, settings, parsed.samples, parsed.pieces, parsed.beam_width, rng)
+    seconds = time.perf_counter() - start
+    print(f"{placements} placements in {seconds:.1f}s ({placements/seconds*60/1e6:.1f} million per minute)")
+
+if __name__ == "__main__":
+    main()
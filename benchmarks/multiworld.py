@@ -0,0 +1,40 @@
+"""
+Generates Dracomino multiworlds on Archipelago's MultiWorld up to rules, with items placed anywhere regardless of logic.
+Used by the benchmarks that need real regions and CollectionState, and by the tests.
+"""
+from argparse import Namespace
+from typing import Any, List
+
+from BaseClasses import MultiWorld, CollectionState
+from worlds.AutoWorld import call_all
+
+from .. import DracominoWorld
+
+GENERATION_STEPS:List[str] = ["generate_early", "create_regions", "create_items", "set_rules"]
+
+def generate(players:int, seed:int, **option_values:Any) -> MultiWorld:
+    "Generate Dracomino slots with the same options and place their items at random"
+    multiworld = MultiWorld(players)
+    multiworld.game = {player: DracominoWorld.game for player in multiworld.player_ids}
+    multiworld.player_name = {player: f"Dracomino{player}" for player in multiworld.player_ids}
+    multiworld.set_seed(seed)
+    args = Namespace()
+    for name, option in DracominoWorld.options_dataclass.type_hints.items():
+        setattr(args, name, {player: option.from_any(option_values.get(name, option.default)) for player in multiworld.player_ids})
+    multiworld.set_options(args)
+    multiworld.state = CollectionState(multiworld)
+    for step in GENERATION_STEPS:
+        call_all(multiworld, step)
+        if step == "generate_early":
+            for player in multiworld.player_ids:
+                for item_name, count in multiworld.worlds[player].options.start_inventory.value.items():
+                    for _ in range(count):
+                        multiworld.push_precollected(multiworld.create_item(item_name, player))
+    # Logic isn't needed to time sweeps or to compare spheres
+    items = list(multiworld.itempool)
+    multiworld.random.shuffle(items)
+    locations = multiworld.get_unfilled_locations()
+    multiworld.random.shuffle(locations)
+    for location, item in zip(locations, items):
+        multiworld.push_item(location, item, collect=False)
+    return multiworld
@@ -0,0 +1,138 @@
+"""
+Generates a solo Dracomino slot for each of many random option sets on the stand-in multiworld, across a process pool,
+and ranks which settings are slowest and use the most memory.
+
+    python -m worlds.dracomino.benchmarks.option_space
+    python -m worlds.dracomino.benchmarks.option_space --samples 5000 --workers 8 --json option_space.json
+
+Each option set runs generate_early, create_regions, create_items, set_rules and fill_slot_data, and records whether it
+raised an OptionError, hit the duplicate placement assertion, raised anything else or printed the "More items than
+locations" warning.
+Times and memory come from Profiler, so they include tracemalloc's overhead.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from Options import OptionError
+
+from ..Options import DracominoOptions, AbilityWhitelist
+from .generation import create_world
+from .standin import StandInMultiWorld, run_stages
+
+SAMPLES:int = 2000
+SEED:int = 1
+TOP:int = 10
+# Range options that are sampled across their whole range
+SAMPLED_RANGES:List[str] = [
+    "goal",
+    "monomino_weight",
+    "domino_weight",
+    "tromino_weight",
+    "tetromino_weight",
+    "pentomino_weight",
+    "extra_shapes",
+    "max_stacking_height",
+    "line_clear_leniency",
+    "trap_weight",
+    "tutorials",
+]
+STAGES:List[str] = ["generate_early", "create_regions", "create_items", "set_rules", "fill_slot_data"]
+
+OUTCOME_OK = "ok"
+OUTCOME_OPTION_ERROR = "option_error"
+OUTCOME_DUPLICATE_PLACEMENT = "duplicate_placement"
+OUTCOME_ERROR = "error" # Any other exception
+
+def sample_option_values(rng:random.Random) -> Dict[str, Any]:
+    option_values:Dict[str, Any] = {}
+    for name in SAMPLED_RANGES:
+        option = DracominoOptions.type_hints[name]
+        option_values[name] = rng.randint(option.range_start, option.range_end)
+    option_values["ability_whitelist"] = sorted(name for name in AbilityWhitelist.valid_keys if rng.random() < 0.5)
+    return option_values
+
+def explore(seed:int, option_values:Dict[str, Any]) -> Dict[str, Any]:
+    "Generate one slot with the options and report how it went"
+    multiworld = StandInMultiWorld(1, seed)
+    world = create_world(multiworld, 1, option_values)
+    multiworld.worlds[1] = world
+    result:Dict[str, Any] = {"seed": seed, "options": option_values, "outcome": OUTCOME_OK}
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            run_stages(multiworld, [world], STAGES)
+        except OptionError as e:
+            result["outcome"] = OUTCOME_OPTION_ERROR
+            result["message"] = str(e)
+        except Exception as e:
+            # Anything unexpected is recorded too, so one bad option set doesn't stop the rest from being explored
+            if isinstance(e, AssertionError) and "multiple location placement" in str(e):
+                result["outcome"] = OUTCOME_DUPLICATE_PLACEMENT
+                result["message"] = str(e)
+            else:
+                result["outcome"] = OUTCOME_ERROR
+                result["message"] = f"{type(e).__name__}: {e}"
+                result["traceback"] = traceback.format_exc()
+    result["more_items_than_locations"] = "More items than locations" in output.getvalue()
+    stages = world.dracomino_profiler.stages
+    result["seconds"] = sum(profile.wall_time for profile in stages.values())
+    result["peak_bytes"] = max((profile.peak_allocated for profile in stages.values()), default=0)
+    result["stage_seconds"] = {stage: stages[stage].wall_time for stage in STAGES if stage in stages}
+    return result
+
+def run(samples:int = SAMPLES, seed:int = SEED, workers:Optional[int] = None) -> List[Dict[str, Any]]:
+    "Explore random option sets across a process pool; workers defaults to every core"
+    rng = random.Random(seed)
+    option_sets = [sample_option_values(rng) for _ in range(samples)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(explore, range(seed, seed + samples), option_sets, chunksize=max(1, samples//64)))
+
+def format_options(option_values:Dict[str, Any]) -> str:
+    return " ".join(f"{name}={value}" for name, value in option_values.items() if name != "ability_whitelist")
+
+def print_report(results:List[Dict[str, Any]], top:int) -> None:
+    counts:Dict[str, int] = {}
+    for result in results:
+        counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+    print(f"{len(results)} option sets: " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())))
+    print(f"{sum(result['more_items_than_locations'] for result in results)} printed \"More items than locations\"")
+    for result in results:
+        if result["outcome"] == OUTCOME_DUPLICATE_PLACEMENT or result["more_items_than_locations"]:
+            print(f"    seed {result['seed']}: {result['outcome']} {format_options(result['options'])}")
+    errors = [result for result in results if result["outcome"] == OUTCOME_ERROR]
+    if errors:
+        print(f"\n{len(errors)} raised an unexpected exception; --json keeps their tracebacks:")
+        for result in errors:
+            print(f"    seed {result['seed']}: {result['message']}\n        {format_options(result['options'])}")
+
+    generated = [result for result in results if result["outcome"] == OUTCOME_OK]
+    print(f"\nSlowest {top}:")
+    for result in sorted(generated, key=lambda result: result["seconds"], reverse=True)[:top]:
+        print(f"    {result['seconds']*1000:>8.1f} ms  {format_options(result['options'])}")
+    print(f"\nMost memory {top}:")
+    for result in sorted(generated, key=lambda result: result["peak_bytes"], reverse=True)[:top]:
+        print(f"    {result['peak_bytes']/1024:>8.0f} KiB {format_options(result['options'])}")
+
+def main(args:Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stress test Dracomino generation across random options")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, help="Processes to use; defaults to every core")
+    parser.add_argument("--top", type=int, default=TOP)
+    parser.add_argument("--json", help="Also write every result to this file")
+    parsed = parser.parse_args(args)
+
+    results = run(parsed.samples, parsed.seed, parsed.workers)
+    print_report(results, parsed.top)
+    if parsed.json:
+        with open(parsed.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
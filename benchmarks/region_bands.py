@@ -0,0 +1,46 @@
+"""
+Compares sweep time with every location in Menu against locations split into height band regions.
+
+    python -m worlds.dracomino.benchmarks.region_bands
+"""
+import time
+from typing import Any, Dict, List
+
+from BaseClasses import MultiWorld, CollectionState
+
+from .multiworld import generate
+
+GOALS:List[int] = [100, 500, 1000]
+BAND_LINES:List[int] = [0, 5, 10, 20] # 0 is every location in Menu
+SWEEPS:int = 5
+SEED:int = 1
+
+def time_sweeps(multiworld:MultiWorld, sweeps:int) -> float:
+    "Average time of sweeping from nothing"
+    total:float = 0
+    for _ in range(sweeps):
+        state = CollectionState(multiworld)
+        sweep = getattr(state, "sweep_for_advancements", None) or state.sweep_for_events
+        start = time.perf_counter()
+        sweep()
+        total += time.perf_counter() - start
+    return total/sweeps
+
+def run(goals:List[int] = GOALS, band_lines:List[int] = BAND_LINES, sweeps:int = SWEEPS) -> List[Dict[str, Any]]:
+    results:List[Dict[str, Any]] = []
+    for goal in goals:
+        for lines in band_lines:
+            multiworld = generate(1, SEED, goal=goal, height_band_lines=lines)
+            results.append({
+                "goal": goal,
+                "band_lines": lines,
+                "regions": len(multiworld.get_regions(1)),
+                "locations": len(multiworld.get_locations(1)),
+                "sweep_seconds": time_sweeps(multiworld, sweeps),
+            })
+    return results
+
+if __name__ == "__main__":
+    print(f"{'goal':>6} {'bands':>6} {'regions':>8} {'locations':>10} {'sweep (ms)':>11}")
+    for result in run():
+        print(f"{result['goal']:>6} {result['band_lines'] or '-':>6} {result['regions']:>8} {result['locations']:>10} {result['sweep_seconds']*1000:>11.2f}")
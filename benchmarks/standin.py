@@ -0,0 +1,175 @@
+"""
+Minimal stand-ins for MultiWorld and CollectionState, with just enough for Dracomino worlds to generate and be swept.
+They skip everything a real generation does for other games, so timings only cover Dracomino's own code.
+"""
+import random
+from typing import Counter, Dict, Iterable, List, Set
+
+from BaseClasses import MultiWorld, Region, Location, Entrance, Item
+from worlds.AutoWorld import World
+
+class StandInMultiWorld:
+    players:int
+    player_ids:List[int]
+    player_name:Dict[int, str]
+    worlds:Dict[int, World]
+    regions:MultiWorld.RegionManager
+    itempool:List[Item]
+    precollected_items:Dict[int, List[Item]]
+    early_items:Dict[int, Dict[str, int]]
+    completion_condition:Dict[int, object]
+    random:random.Random
+    state:"StandInCollectionState"
+
+    def __init__(self, players:int, seed:int):
+        self.players = players
+        self.player_ids = list(range(1, players + 1))
+        self.player_name = {player: f"Dracomino{player}" for player in self.player_ids}
+        self.worlds = {}
+        self.regions = MultiWorld.RegionManager(players)
+        self.itempool = []
+        self.precollected_items = {player: [] for player in self.player_ids}
+        self.early_items = {player: {} for player in self.player_ids}
+        self.completion_condition = {}
+        self.random = random.Random(seed)
+        self.state = StandInCollectionState(self)
+
+    def get_player_name(self, player:int) -> str:
+        return self.player_name[player]
+
+    def get_out_file_name_base(self, player:int) -> str:
+        return f"AP_benchmark_P{player}_{self.player_name[player]}"
+
+    def get_region(self, region_name:str, player:int) -> Region:
+        return self.regions.region_cache[player][region_name]
+
+    def get_regions(self, player:int) -> Iterable[Region]:
+        return self.regions.region_cache[player].values()
+
+    def get_entrances(self, player:int) -> Iterable[Entrance]:
+        return self.regions.entrance_cache[player].values()
+
+    def get_locations(self, player:int) -> Iterable[Location]:
+        return self.regions.location_cache[player].values()
+
+    def get_all_locations(self) -> List[Location]:
+        return [location for player in self.player_ids for location in self.get_locations(player)]
+
+    def get_unfilled_locations(self, player:int) -> List[Location]:
+        return [location for location in self.get_locations(player) if location.item is None]
+
+    def push_precollected(self, item:Item) -> None:
+        self.precollected_items[item.player].append(item)
+        self.state.collect(item, True)
+
+    def fill_randomly(self) -> None:
+        "Put items anywhere, ignoring logic; sweeps only need every location filled"
+        items = list(self.itempool)
+        self.random.shuffle(items)
+        locations = self.get_all_locations()
+        self.random.shuffle(locations)
+        for location, item in zip(locations, items):
+            location.item = item
+            item.location = location
+
+def run_stages(multiworld:StandInMultiWorld, worlds:Iterable[World], stages:Iterable[str]) -> None:
+    """
+    Run generation stages in Archipelago's order: each stage on every world, then the worlds' stage_ classmethods.
+    Start inventory is given once generate_early is done, like Main does
+    """
+    worlds = list(worlds)
+    for stage in stages:
+        for world in worlds:
+            getattr(world, stage)()
+        for world_type in {type(world) for world in worlds}:
+            stage_method = getattr(world_type, f"stage_{stage}", None)
+            if stage_method:
+                stage_method(multiworld)
+        if stage == "generate_early":
+            for world in worlds:
+                for item_name, count in world.options.start_inventory.value.items():
+                    for _ in range(count):
+                        multiworld.push_precollected(world.create_item(item_name))
+
+class StandInCollectionState:
+    "Tracks the same things as CollectionState that Dracomino worlds and rules look at, and counts rule evaluations"
+    multiworld:StandInMultiWorld
+    prog_items:Dict[int, Counter[str]]
+    reachable_regions:Dict[int, Set[Region]]
+    stale:Dict[int, bool]
+    locations_checked:Set[Location]
+    sweeps:int # Passes over the remaining locations
+    rule_calls:int
+
+    def __init__(self, multiworld:StandInMultiWorld):
+        self.multiworld = multiworld
+        self.prog_items = {player: Counter() for player in multiworld.player_ids}
+        self.reachable_regions = {player: set() for player in multiworld.player_ids}
+        self.stale = {player: True for player in multiworld.player_ids}
+        self.locations_checked = set()
+        self.sweeps = 0
+        self.rule_calls = 0
+        for items in multiworld.precollected_items.values():
+            for item in items:
+                self.collect(item, True)
+
+    def has(self, item:str, player:int, count:int = 1) -> bool:
+        return self.prog_items[player][item] >= count
+
+    def count(self, item:str, player:int) -> int:
+        return self.prog_items[player][item]
+
+    def collect(self, item:Item, prevent_sweep:bool = False) -> bool:
+        changed = self.multiworld.worlds[item.player].collect(self, item)
+        if changed:
+            self.stale[item.player] = True
+        return changed
+
+    def remove(self, item:Item) -> bool:
+        changed = self.multiworld.worlds[item.player].remove(self, item)
+        if changed:
+            # Regions may have become unreachable, so find them all again
+            self.reachable_regions[item.player].clear()
+            self.stale[item.player] = True
+        return changed
+
+    def update_reachable_regions(self, player:int) -> None:
+        "Regions only get more reachable as items are collected, so continue from the ones already found"
+        reachable = self.reachable_regions[player]
+        if not reachable:
+            reachable.add(self.multiworld.get_region("Menu", player))
+        queue = [exit_ for region in reachable for exit_ in region.exits]
+        while queue:
+            entrance = queue.pop()
+            if entrance.connected_region in reachable:
+                continue
+            self.rule_calls += 1
+            if entrance.access_rule(self):
+                reachable.add(entrance.connected_region)
+                queue.extend(entrance.connected_region.exits)
+        self.stale[player] = False
+
+    def can_reach_location(self, location:Location) -> bool:
+        if self.stale[location.player]:
+            self.update_reachable_regions(location.player)
+        if location.parent_region not in self.reachable_regions[location.player]:
+            return False
+        self.rule_calls += 1
+        return location.access_rule(self)
+
+    def sweep(self) -> None:
+        "Collect everything reachable until nothing new is, like CollectionState.sweep_for_advancements"
+        locations = [location for location in self.multiworld.get_all_locations() if location.item and location not in self.locations_checked]
+        while locations:
+            self.sweeps += 1
+            found = [location for location in locations if self.can_reach_location(location)]
+            if not found:
+                break
+            for location in found:
+                self.locations_checked.add(location)
+                self.collect(location.item, True)
+            found_set = set(found)
+            locations = [location for location in locations if location not in found_set]
+
+    def has_beaten_game(self, player:int) -> bool:
+        return self.multiworld.completion_condition[player](self)
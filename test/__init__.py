@@ -0,0 +1,4 @@
+from test.bases import WorldTestBase
+
+class DracominoTestBase(WorldTestBase):
+    game = "Dracomino"
@@ -0,0 +1,35 @@
+import json
+import unittest
+
+from ..Audit import create_audit_input, get_logic_spheres, load_audit_slot
+from ..benchmarks.multiworld import generate
+from ..Locations import get_location_names_with_tag
+from ..Spheres import DracominoSphereCalculator, get_received_items_by_sphere
+
+SEEDS:int = 5
+OPTION_SETS = [
+    {"goal": 20},
+    {"goal": 3, "extra_shapes": 0, "trap_weight": 0, "start_inventory": {"U Pentomino": 1},
+     "monomino_weight": 0, "domino_weight": 0, "tromino_weight": 0, "tetromino_weight": 0, "pentomino_weight": 1},
+    {"goal": 25, "start_inventory": {"L Tromino": 2, "Monomino": 3}, "height_band_lines": 10},
+]
+
+class TestAudit(unittest.TestCase):
+    "The audit's logic spheres, from slot data alone, should agree with the world's"
+
+    def test_logic_spheres_match_world(self) -> None:
+        for option_values in OPTION_SETS:
+            for seed in range(SEEDS):
+                with self.subTest(seed=seed, **option_values):
+                    multiworld = generate(1, seed, **option_values)
+                    world = multiworld.worlds[1]
+                    spheres = DracominoSphereCalculator.from_world(world).calculate(
+                        get_received_items_by_sphere(multiworld, world.player)
+                    )
+                    placements = world.item_pickup_placements
+                    coin_names = get_location_names_with_tag("item_pickup", len(placements))
+                    expected = {placement: spheres.locations.get(name) for name, placement in zip(coin_names, placements)}
+
+                    # Round trip through JSON like the audit's input file
+                    slot = load_audit_slot(json.loads(json.dumps(create_audit_input(world))))
+                    self.assertEqual(get_logic_spheres(slot), expected)
@@ -0,0 +1,167 @@
+import unittest
+from random import Random
+from types import SimpleNamespace
+from typing import Callable, Counter, Dict, List
+
+from BaseClasses import CollectionState, Item
+
+from . import DracominoTestBase
+from .. import Util
+from ..Constants import BOARD_WIDTH
+from ..Items import item_data_table
+from ..Locations import location_data_table, DracominoLocation
+from ..Rules import (
+    DracominoLogic, compile_item_pickup_requirement, create_logic_settings, create_frontier_rule, create_line_frontier_rule,
+)
+from ..Tags import TAG_LINE_CLEAR, TAG_ITEM_PICKUP, TAG_HAS_CORNER_GAP, TAG_HAS_SECOND_TILE_GAP
+
+STATES:int = 50
+
+def create_closure_rules(world) -> Dict[str, Callable[[CollectionState], bool]]:
+    "Location rules the way set_rules made them before they were compiled, plus the completion condition"
+    player = world.player
+    options = world.options
+    SHAPES_THAT_CAN_BE_PLACED_IN_CORNER = {shape_name for shape_name in world.dracomino_itempool.shapes if not item_data_table[shape_name].has_tags(TAG_HAS_CORNER_GAP)}
+    SHAPES_THAT_CAN_BE_PLACED_ONE_TILE_FROM_CORNER = {shape_name for shape_name in world.dracomino_itempool.shapes if not item_data_table[shape_name].has_tags(TAG_HAS_SECOND_TILE_GAP)}
+    SHAPE_TYPES = set(Util.get_shape_weights(options).keys())
+    HAS_ONLY_MONOMINOS = len(SHAPE_TYPES.difference({"monomino"})) == 0
+
+    def can_rotate(state:CollectionState) -> bool:
+        return HAS_ONLY_MONOMINOS or state.has_group("Rotate", player)
+
+    def create_item_pickup_rule(amount:int, placement:int) -> Callable[[CollectionState], bool]:
+        BOARD_HEIGHT_UPGRADES = 20
+        ACTUAL_MAX_STACKING_HEIGHT = min(options.max_stacking_height.value, options.goal.value)
+        height_limit:int = min(BOARD_HEIGHT_UPGRADES, ACTUAL_MAX_STACKING_HEIGHT) - 1
+        location_height = placement//BOARD_WIDTH
+        reach_height:int = min(height_limit, location_height)
+        SHAPE_VALUE_REDUCTION_WITH_ROTATIONS:int = reach_height*(BOARD_WIDTH - 2)
+        SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS:int = reach_height*(BOARD_WIDTH - 4)
+
+        def without_rotate(state:CollectionState) -> bool:
+            if location_height > ACTUAL_MAX_STACKING_HEIGHT or HAS_ONLY_MONOMINOS:
+                return False
+            if placement == 1 or placement == BOARD_WIDTH - 1:
+                return state.has_any(SHAPES_THAT_CAN_BE_PLACED_IN_CORNER, player)
+            if placement == 2 or placement == BOARD_WIDTH - 2:
+                return state.has_any(SHAPES_THAT_CAN_BE_PLACED_ONE_TILE_FROM_CORNER, player)
+            return (state.has("Shape Value", player, 1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITHOUT_ROTATIONS))
+                    and state.has("Poor Height", player, reach_height))
+
+        return lambda state: (
+            can_rotate(state)
+            and state.has("Shape Value", player, 1 + max(0, amount - SHAPE_VALUE_REDUCTION_WITH_ROTATIONS))
+            and state.has("Safe Height", player, reach_height)
+        ) or without_rotate(state)
+
+    def create_line_clear_rule(amount:int) -> Callable[[CollectionState], bool]:
+        return lambda state: can_rotate(state) and state.has("Shape Value", player, amount)
+
+    rules:Dict[str, Callable[[CollectionState], bool]] = {}
+    for location in world.get_locations():
+        if isinstance(location, DracominoLocation):
+            location_data = location_data_table[location.name]
+            if location_data.has_tags(TAG_LINE_CLEAR):
+                rules[location.name] = create_line_clear_rule(location.shape_value_to_reach)
+            elif location_data.has_tags(TAG_ITEM_PICKUP):
+                rules[location.name] = create_item_pickup_rule(location.shape_value_to_reach, location.placement)
+    rules["Completion"] = create_line_clear_rule((options.goal.value + options.line_clear_leniency.value)*BOARD_WIDTH)
+    return rules
+
+class TestCompiledRules(DracominoTestBase):
+    "Compiled rules should give the same results as the closure rules they replaced"
+    options = {
+        "goal": 40,
+    }
+
+    def test_rules_match_closure_rules(self) -> None:
+        rules = create_closure_rules(self.world)
+        locations = {location.name: location for location in self.world.get_locations() if location.name in rules}
+        items:List[Item] = [item for item in self.multiworld.itempool if item.player == self.player and item.advancement]
+        random = Random(self.multiworld.seed)
+        for _ in range(STATES):
+            state = CollectionState(self.multiworld)
+            collected = [item for item in items if random.random() < random.random()]
+            for item in collected:
+                state.collect(item, True)
+            # Removing exercises the counters going down
+            for item in random.sample(collected, len(collected)//5):
+                state.remove(item)
+            for name, rule in rules.items():
+                compiled = self.multiworld.completion_condition[self.player] if name == "Completion" else locations[name].access_rule
+                self.assertEqual(compiled(state), rule(state), name)
+
+    def test_collect_items_matches_collect(self) -> None:
+        items:List[Item] = [item for item in self.multiworld.itempool if item.player == self.player and item.advancement]
+        Random(self.multiworld.seed).shuffle(items)
+        items = items[:len(items)//2]
+        one_by_one = CollectionState(self.multiworld)
+        for item in items:
+            one_by_one.collect(item, True)
+        at_once = CollectionState(self.multiworld)
+        self.world.collect_items(at_once, items)
+        self.assertEqual(at_once.prog_items[self.player], one_by_one.prog_items[self.player])
+
+class TestCompiledRulesLowStackingHeight(TestCompiledRules):
+    options = {
+        "goal": 30,
+        "max_stacking_height": 5,
+        "tetromino_weight": 0,
+        "pentomino_weight": 5,
+        "monomino_weight": 1,
+    }
+
+class TestCompiledRulesHighStackingHeight(TestCompiledRules):
+    options = {
+        "goal": 60,
+        "max_stacking_height": 30,
+        "tromino_weight": 3,
+        "tetromino_weight": 0,
+    }
+
+class TestCompiledRulesStartingShapes(TestCompiledRules):
+    options = {
+        "goal": 30,
+        "start_inventory": {"L Tromino": 2, "I Tromino": 1, "Monomino": 3},
+    }
+
+class TestCompiledRulesMonominoPool(TestCompiledRules):
+    "Only monominos are drawn, but get_logic_settings still expects rotate; TestOnlyMonominosLogic covers logic without it"
+    options = {
+        "goal": 20,
+        "monomino_weight": 1,
+        "tetromino_weight": 0,
+        "extra_shapes": 0,
+        "trap_weight": 0,
+    }
+
+class TestOnlyMonominosLogic(unittest.TestCase):
+    "With only monominos, coins and line clears need Shape Value and Safe Height without rotate, and nothing else"
+    goal:int = 30
+    max_stacking_height:int = 15
+
+    def test_frontier_rules_match_closure_rules(self) -> None:
+        settings = create_logic_settings(self.goal, self.max_stacking_height, True)
+        logic = DracominoLogic(settings, self.goal)
+        height_limit = min(20, self.max_stacking_height, self.goal) - 1
+        random = Random(1)
+        for _ in range(STATES):
+            counts:Counter[str] = Counter({
+                "Shape Value": random.randint(0, (self.goal + 5)*BOARD_WIDTH),
+                "Safe Height": random.randint(0, 30),
+                "Poor Height": random.randint(0, 30),
+                "Corner Shapes": random.randint(0, 1),
+                "Second Tile Shapes": random.randint(0, 1),
+            })
+            logic.update_frontier(counts)
+            state = SimpleNamespace(prog_items={1: counts})
+            for placement in range((self.goal + 5)*BOARD_WIDTH):
+                amount = placement - placement % BOARD_WIDTH
+                reach_height = min(height_limit, placement//BOARD_WIDTH)
+                expected = (counts["Shape Value"] >= 1 + max(0, amount - reach_height*(BOARD_WIDTH - 2))
+                            and counts["Safe Height"] >= reach_height)
+                rule = create_frontier_rule(compile_item_pickup_requirement(settings, amount, placement), 1, placement)
+                self.assertEqual(rule(state), expected, placement)
+            for line in range(1, self.goal + 5):
+                amount = line*BOARD_WIDTH
+                self.assertEqual(create_line_frontier_rule(1, amount)(state), counts["Shape Value"] >= amount, line)
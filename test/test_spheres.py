@@ -0,0 +1,42 @@
+import unittest
+from typing import Dict
+
+from BaseClasses import CollectionState
+
+from ..benchmarks.multiworld import generate
+from ..Spheres import DracominoSphereCalculator, get_received_items_by_sphere
+
+PLAYERS:int = 2
+SEEDS:int = 3
+OPTION_SETS = [
+    {"goal": 30},
+    {"goal": 30, "height_band_lines": 5},
+    {"goal": 40, "max_stacking_height": 5, "pentomino_weight": 5, "monomino_weight": 1, "tetromino_weight": 0},
+    {"goal": 40, "max_stacking_height": 5, "pentomino_weight": 5, "monomino_weight": 1, "tetromino_weight": 0, "height_band_lines": 3},
+    {"goal": 25, "start_inventory": {"L Tromino": 2, "I Tromino": 1, "Monomino": 3}, "height_band_lines": 10},
+]
+
+class TestSpheres(unittest.TestCase):
+    "The sphere calculator should agree with MultiWorld.get_spheres"
+
+    def test_spheres_match_multiworld(self) -> None:
+        for option_values in OPTION_SETS:
+            for seed in range(SEEDS):
+                with self.subTest(seed=seed, **option_values):
+                    multiworld = generate(PLAYERS, seed, **option_values)
+                    expected:Dict[int, Dict[str, int]] = {player: {} for player in multiworld.player_ids}
+                    for sphere_number, sphere in enumerate(multiworld.get_spheres()):
+                        if not sphere:
+                            # Whatever is left after an empty sphere is unreachable
+                            break
+                        for location in sphere:
+                            expected[location.player][location.name] = sphere_number
+
+                    state = CollectionState(multiworld)
+                    state.sweep_for_advancements()
+                    for player, world in multiworld.worlds.items():
+                        spheres = DracominoSphereCalculator.from_world(world).calculate(
+                            get_received_items_by_sphere(multiworld, player)
+                        )
+                        self.assertEqual(spheres.locations, expected[player])
+                        self.assertEqual(spheres.completion is not None, multiworld.completion_condition[player](state))